@@ -0,0 +1,93 @@
+import logging
+import threading
+import time
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.auth.models import PasswordHashCost
+from app.core.config import settings
+from app.core.security import bcrypt_rounds, calibrate_bcrypt_rounds, set_bcrypt_rounds
+
+logger = logging.getLogger("app.auth.hash_cost")
+
+_ROW_ID = 1
+
+
+class SharedBcryptCost:
+    """
+    The bcrypt cost shared by every worker, kept in the password_hash_cost row.
+
+    PASSWORD_HASH_ROUNDS pins the cost outright. Otherwise the first worker
+    to start on an empty database calibrates to PASSWORD_HASH_TARGET_MS and
+    stores the result; every later start, in any worker, reads it instead of
+    measuring again. An admin recalibration rewrites the row, and workers
+    adopt it within PASSWORD_HASH_SYNC_SECONDS. Rehashing only ever raises a
+    hash's cost, so workers briefly on different costs don't undo each other.
+    """
+
+    def __init__(self, sync_seconds: float):
+        self.sync_seconds = sync_seconds
+        self._lock = threading.Lock()
+        self._synced_at = float("-inf")
+
+    def load(self, db: Session) -> int:
+        """Apply the pinned or stored cost, calibrating and storing it if there is none yet"""
+        if settings.PASSWORD_HASH_ROUNDS is not None:
+            return self._adopt(settings.PASSWORD_HASH_ROUNDS)
+
+        row = db.get(PasswordHashCost, _ROW_ID)
+        if row is None:
+            rounds = self._calibrate()
+            db.add(PasswordHashCost(id=_ROW_ID, rounds=rounds))
+            try:
+                db.commit()
+                logger.info(f"Stored calibrated bcrypt cost {rounds}")
+            except IntegrityError:
+                # Another worker stored its calibration first; everyone uses that one
+                db.rollback()
+                row = db.get(PasswordHashCost, _ROW_ID)
+                rounds = row.rounds
+        else:
+            rounds = row.rounds
+        return self._adopt(rounds)
+
+    def sync(self, db: Session) -> None:
+        """Pick up a cost stored by another worker, at most every sync_seconds"""
+        if settings.PASSWORD_HASH_ROUNDS is not None:
+            return
+        with self._lock:
+            if time.monotonic() - self._synced_at < self.sync_seconds:
+                return
+            self._synced_at = time.monotonic()
+        rounds = db.query(PasswordHashCost.rounds).filter(PasswordHashCost.id == _ROW_ID).scalar()
+        if rounds is not None and rounds != bcrypt_rounds():
+            logger.info(f"Adopting stored bcrypt cost: {bcrypt_rounds()} -> {rounds}")
+            self._adopt(rounds)
+
+    def store(self, db: Session, rounds: int) -> int:
+        """Save a recalibrated cost for all workers and apply it here"""
+        row = db.get(PasswordHashCost, _ROW_ID)
+        if row is None:
+            db.add(PasswordHashCost(id=_ROW_ID, rounds=rounds))
+        else:
+            row.rounds = rounds
+        db.commit()
+        return self._adopt(rounds)
+
+    def _calibrate(self) -> int:
+        return calibrate_bcrypt_rounds(
+            settings.PASSWORD_HASH_TARGET_MS,
+            settings.PASSWORD_HASH_MIN_ROUNDS,
+            settings.PASSWORD_HASH_MAX_ROUNDS
+        )
+
+    def _adopt(self, rounds: int) -> int:
+        set_bcrypt_rounds(rounds)
+        with self._lock:
+            self._synced_at = time.monotonic()
+        logger.info(f"bcrypt cost set to {rounds}")
+        return rounds
+
+
+bcrypt_cost = SharedBcryptCost(sync_seconds=settings.PASSWORD_HASH_SYNC_SECONDS)
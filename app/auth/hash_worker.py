@@ -0,0 +1,12 @@
+"""
+Password hashing entry point for worker processes.
+
+Kept free of app imports: pool processes are spawned, not forked, and
+spawned children import the module of the function they run.
+"""
+import bcrypt
+
+
+def hash_password(password: str, rounds: int) -> str:
+    """bcrypt hash in the $2b$ format passlib verifies"""
+    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(rounds=rounds)).decode("utf-8")
@@ -1,5 +1,5 @@
-from sqlalchemy import Column, Integer, String, Boolean, Enum, DateTime, UniqueConstraint
-from sqlalchemy.sql import func
+from sqlalchemy import Column, Integer, String, Boolean, Enum, DateTime, Float, ForeignKey, Index, UniqueConstraint
+from sqlalchemy.sql import func, text
 from sqlalchemy.orm import relationship
 
 from app.core.database import Base
@@ -19,8 +19,68 @@ class User(Base):
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     last_login = Column(DateTime(timezone=True))
+    # Epoch seconds; access tokens issued before it are rejected ("sign out everywhere")
+    tokens_valid_after = Column(Float, nullable=True)
+    # Superseded by PasswordResetToken; kept so existing databases still map
     reset_token = Column(String, nullable=True)
     reset_token_expires = Column(DateTime(timezone=True), nullable=True)
     cart_items = relationship("CartItem", back_populates="user", cascade="all, delete-orphan")
     orders = relationship("Order", back_populates="user", cascade="all, delete-orphan")
-    products = relationship("Product", back_populates="creator")
\ No newline at end of file
+    products = relationship("Product", back_populates="creator")
+
+class RefreshToken(Base):
+    __tablename__ = "refresh_tokens"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), index=True, nullable=False)
+    # Only a SHA-256 digest is stored, so a leaked table cannot mint tokens
+    token_hash = Column(String(64), unique=True, nullable=False)
+    # Every token rotated from the same sign-in shares a family
+    family_id = Column(String(32), index=True, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+    rotated_at = Column(DateTime(timezone=True), nullable=True)
+    revoked_at = Column(DateTime(timezone=True), nullable=True)
+
+
+class PasswordResetToken(Base):
+    __tablename__ = "password_reset_tokens"
+    __table_args__ = (
+        # Validation only ever looks for unused tokens, so the hot index
+        # leaves consumed rows out and stays as small as the pending resets
+        Index(
+            "ix_password_reset_tokens_pending",
+            "token_hash", "expires_at",
+            sqlite_where=text("used_at IS NULL"),
+            postgresql_where=text("used_at IS NULL")
+        ),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), index=True, nullable=False)
+    # SHA-256 of the emailed token; the plaintext is never stored
+    token_hash = Column(String(64), unique=True, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+    used_at = Column(DateTime(timezone=True), nullable=True)
+
+
+class RevokedToken(Base):
+    __tablename__ = "revoked_tokens"
+
+    # Autoincrement ids let workers fetch only revocations they have not seen
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    jti = Column(String(32), unique=True, nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    # The token's own expiry; past it the row is useless and gets pruned
+    expires_at = Column(DateTime(timezone=True), index=True, nullable=False)
+    revoked_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class PasswordHashCost(Base):
+    __tablename__ = "password_hash_cost"
+
+    # A single row (id 1): the bcrypt cost every worker hashes at
+    id = Column(Integer, primary_key=True)
+    rounds = Column(Integer, nullable=False)
+    calibrated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -0,0 +1,140 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session
+
+from app.auth.models import User
+from app.auth.schemas import UserRole
+from app.core.config import settings
+
+logger = logging.getLogger("app.auth.principals")
+
+# Changes to any of these end every cached authorization decision for the user
+AUTH_ATTRIBUTES = ("email", "role", "is_active", "hashed_password", "tokens_valid_after")
+
+
+@dataclass(frozen=True)
+class Principal:
+    """The authorization-relevant fields of an authenticated user"""
+    id: int
+    email: str
+    role: UserRole
+    is_active: bool
+    # Epoch seconds; access tokens issued earlier are no longer accepted
+    tokens_valid_after: Optional[float] = None
+
+
+class PrincipalCache:
+    """
+    Bounded LRU cache of principals by user id, with a per-entry TTL.
+
+    Committed changes to a user's email, role, active flag, password or token
+    cutoff drop the entry (see the session hooks below), so the TTL only bounds how long
+    another worker process may authorize with stale data. A lookup that raced
+    with an invalidation does not store its result, so a row read just
+    before a commit cannot be cached after the commit dropped it.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def load(self, db: Session, user_id: int) -> Optional[Principal]:
+        """Return the cached principal, reading the user row only on a miss"""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            generation = self._generation
+
+        row = db.execute(
+            select(User.id, User.email, User.role, User.is_active, User.tokens_valid_after).where(User.id == user_id)
+        ).first()
+        if row is None:
+            return None
+        principal = Principal(
+            id=row.id,
+            email=row.email,
+            role=row.role,
+            is_active=bool(row.is_active),
+            tokens_valid_after=row.tokens_valid_after
+        )
+
+        with self._lock:
+            if generation == self._generation:
+                self._entries[user_id] = (time.monotonic() + self.ttl_seconds, principal)
+                self._entries.move_to_end(user_id)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return principal
+
+    def invalidate(self, user_id: int) -> None:
+        """Drop a user's entry; call after changing users outside the ORM"""
+        with self._lock:
+            self._generation += 1
+            if self._entries.pop(user_id, None) is not None:
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "invalidations": self.invalidations,
+            }
+
+
+principal_cache = PrincipalCache(
+    max_entries=settings.PRINCIPAL_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.PRINCIPAL_CACHE_TTL_SECONDS
+)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changed_users(session: Session, flush_context) -> None:
+    # Attribute history is still available here; by commit time it is reset
+    changed = session.info.setdefault("changed_user_ids", set())
+    for obj in session.deleted:
+        if isinstance(obj, User):
+            changed.add(obj.id)
+    for obj in session.dirty:
+        if isinstance(obj, User):
+            state = inspect(obj)
+            if any(state.attrs[name].history.has_changes() for name in AUTH_ATTRIBUTES):
+                changed.add(obj.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed_users(session: Session) -> None:
+    for user_id in session.info.pop("changed_user_ids", ()):
+        logger.info(f"Invalidating cached principal for user {user_id}")
+        principal_cache.invalidate(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changed_users(session: Session) -> None:
+    session.info.pop("changed_user_ids", None)
@@ -0,0 +1,136 @@
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.auth.hash_worker import hash_password
+from app.auth.models import User
+from app.auth.schemas import BulkUserCreateResult, UserCreate, UserProvisionOutcome, UserRole
+from app.core.config import settings
+from app.core.security import bcrypt_rounds
+
+logger = logging.getLogger("app.auth.provisioning")
+
+PROVISION_BATCH_SIZE = 500
+
+# Bound parameters per existence query, well under SQLite's variable limit
+EXISTS_CHUNK_SIZE = 500
+
+
+def _existing_accounts(db: Session, users: Sequence[UserCreate]) -> Set[Tuple[str, UserRole]]:
+    """(email, role) pairs that already have an account, in a few IN queries"""
+    emails = sorted({user.email for user in users})
+    existing: Set[Tuple[str, UserRole]] = set()
+    for start in range(0, len(emails), EXISTS_CHUNK_SIZE):
+        chunk = emails[start:start + EXISTS_CHUNK_SIZE]
+        # Served by the email index; the role is matched here, as uq_email_role does
+        existing.update(db.execute(select(User.email, User.role).where(User.email.in_(chunk))).tuples())
+    return existing
+
+
+def _hash_all(passwords: List[str], rounds: int) -> List[str]:
+    processes = min(settings.PROVISIONING_HASH_PROCESSES or os.cpu_count() or 1, len(passwords))
+    if processes <= 1:
+        return [hash_password(password, rounds) for password in passwords]
+    # Spawned, not forked: forking a server process with live threads can
+    # copy held locks into the children
+    with ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context("spawn")) as pool:
+        chunksize = max(1, len(passwords) // (processes * 4))
+        return list(pool.map(hash_password, passwords, repeat(rounds), chunksize=chunksize))
+
+
+def provision_users(db: Session, users: Sequence[UserCreate]) -> BulkUserCreateResult:
+    """
+    Create many accounts at once, reporting an outcome per input row.
+
+    Existing accounts are found with set-based queries up front and rows
+    repeating an (email, role) pair earlier in the request are skipped, so
+    no password is hashed for an account that will not be created. The
+    remaining passwords are hashed across a process pool (one process per
+    core by default), then inserted with executemany in transactions of
+    PROVISION_BATCH_SIZE rows. A batch that still hits uq_email_role, from a
+    signup racing the import, is retried row by row.
+    """
+    started = time.perf_counter()
+    outcomes: Dict[int, UserProvisionOutcome] = {}
+
+    def outcome(row: int, user: UserCreate, status: str, **extra) -> None:
+        outcomes[row] = UserProvisionOutcome(row=row, email=user.email, role=user.role, status=status, **extra)
+
+    existing = _existing_accounts(db, users)
+    seen: Set[Tuple[str, UserRole]] = set()
+    pending: List[Tuple[int, UserCreate]] = []
+    for row, user in enumerate(users, start=1):
+        key = (user.email, user.role)
+        if key in existing:
+            outcome(row, user, "exists", detail="Email already registered for this role")
+        elif key in seen:
+            outcome(row, user, "duplicate", detail="Repeats an earlier row of this request")
+        else:
+            seen.add(key)
+            pending.append((row, user))
+
+    rounds = bcrypt_rounds()
+    hashed = _hash_all([user.password for _, user in pending], rounds)
+    hashed_at = time.perf_counter()
+
+    for start in range(0, len(pending), PROVISION_BATCH_SIZE):
+        batch = pending[start:start + PROVISION_BATCH_SIZE]
+        rows = [
+            dict(email=user.email, name=user.name, role=user.role, hashed_password=password, is_active=True)
+            for (_, user), password in zip(batch, hashed[start:start + PROVISION_BATCH_SIZE])
+        ]
+        try:
+            created = db.execute(insert(User.__table__).returning(User.id, User.email, User.role), rows).all()
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            logger.warning(f"Provisioning batch at row {batch[0][0]} hit existing accounts, retrying row by row")
+            _insert_one_by_one(db, batch, rows, outcome)
+            continue
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Provisioning batch at row {batch[0][0]} failed: {str(e)}", exc_info=True)
+            for row, user in batch:
+                outcome(row, user, "failed", detail="Database error while inserting batch")
+            continue
+        ids = {(email, role): user_id for user_id, email, role in created}
+        for row, user in batch:
+            outcome(row, user, "created", id=ids[(user.email, user.role)])
+
+    results = [outcomes[row] for row in sorted(outcomes)]
+    result = BulkUserCreateResult(
+        created=sum(1 for item in results if item.status == "created"),
+        existing=sum(1 for item in results if item.status in ("exists", "duplicate")),
+        failed=sum(1 for item in results if item.status == "failed"),
+        results=results
+    )
+    logger.info(
+        f"Provisioned {result.created} of {len(users)} users: hashed {len(pending)} passwords at cost {rounds} "
+        f"in {hashed_at - started:.2f}s, inserted in {time.perf_counter() - hashed_at:.2f}s"
+    )
+    return result
+
+
+def _insert_one_by_one(db: Session, batch, rows: List[dict], outcome) -> None:
+    for (row, user), values in zip(batch, rows):
+        try:
+            user_id: Optional[int] = db.execute(insert(User.__table__).returning(User.id), values).scalar_one()
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            outcome(row, user, "exists", detail="Email already registered for this role")
+            continue
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Provisioning row {row} ({user.email}) failed: {str(e)}")
+            outcome(row, user, "failed", detail="Database error while inserting")
+            continue
+        outcome(row, user, "created", id=user_id)
@@ -0,0 +1,110 @@
+import logging
+import secrets
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+
+from sqlalchemy import delete, update
+from sqlalchemy.orm import Session
+
+from app.auth.models import RefreshToken
+from app.core.config import settings
+from app.core.security import hash_token
+from app.exception import InvalidRefreshTokenError
+
+logger = logging.getLogger("app.auth.refresh_tokens")
+
+
+def issue_refresh_token(db: Session, user_id: int, family_id: Optional[str] = None) -> str:
+    """
+    Store a new refresh token for the user and return its plaintext.
+    A fresh sign-in starts a new family; rotation passes the current one.
+    The caller commits.
+    """
+    token = secrets.token_urlsafe(32)
+    db.add(RefreshToken(
+        user_id=user_id,
+        token_hash=hash_token(token),
+        family_id=family_id or secrets.token_hex(16),
+        expires_at=datetime.utcnow() + timedelta(minutes=settings.REFRESH_TOKEN_EXPIRE_MINUTES)
+    ))
+    return token
+
+
+def rotate_refresh_token(db: Session, token: str) -> Tuple[int, str]:
+    """
+    Exchange a refresh token for a new one of the same family and return
+    (user_id, new_token).
+
+    Each token is single use. Presenting one that was already rotated means
+    it was copied, so the whole family is revoked and the legitimate holder
+    has to sign in again too. The old token is retired with a conditional
+    UPDATE, so two concurrent refreshes with the same token cannot both win.
+    """
+    now = datetime.utcnow()
+    stored = db.query(RefreshToken).filter(RefreshToken.token_hash == hash_token(token)).first()
+    if stored is None or stored.revoked_at is not None:
+        raise InvalidRefreshTokenError()
+
+    if stored.rotated_at is not None:
+        revoke_refresh_token_family(db, stored.family_id)
+        db.commit()
+        logger.warning(f"Refresh token reuse for user {stored.user_id}, revoked family {stored.family_id}")
+        raise InvalidRefreshTokenError()
+
+    if stored.expires_at <= now:
+        raise InvalidRefreshTokenError()
+
+    retired = db.execute(
+        update(RefreshToken)
+        .where(
+            RefreshToken.id == stored.id,
+            RefreshToken.rotated_at.is_(None),
+            RefreshToken.revoked_at.is_(None)
+        )
+        .values(rotated_at=now)
+        .execution_options(synchronize_session=False)
+    )
+    if retired.rowcount != 1:
+        # A concurrent request rotated it first; same as reuse
+        db.rollback()
+        revoke_refresh_token_family(db, stored.family_id)
+        db.commit()
+        logger.warning(f"Concurrent refresh token reuse for user {stored.user_id}, revoked family {stored.family_id}")
+        raise InvalidRefreshTokenError()
+
+    return stored.user_id, issue_refresh_token(db, stored.user_id, stored.family_id)
+
+
+def revoke_refresh_token_family(db: Session, family_id: str) -> None:
+    db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.family_id == family_id, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+
+
+def revoke_refresh_token(db: Session, token: str) -> None:
+    """Revoke the family of a presented refresh token, e.g. on logout. Unknown tokens are ignored."""
+    stored = db.query(RefreshToken).filter(RefreshToken.token_hash == hash_token(token)).first()
+    if stored is not None:
+        revoke_refresh_token_family(db, stored.family_id)
+
+
+def revoke_user_refresh_tokens(db: Session, user_id: int) -> None:
+    """Revoke every outstanding refresh token of a user, e.g. after a password reset"""
+    db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.user_id == user_id, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+
+
+def prune_expired_refresh_tokens(db: Session, user_id: int) -> None:
+    """Delete a user's expired tokens; run on sign-in so the table stays bounded"""
+    db.execute(
+        delete(RefreshToken)
+        .where(RefreshToken.user_id == user_id, RefreshToken.expires_at <= datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
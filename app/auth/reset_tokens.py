@@ -0,0 +1,74 @@
+import logging
+import secrets
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.auth.models import PasswordResetToken, User
+from app.auth.schemas import UserRole
+from app.core.config import settings
+from app.core.security import hash_token
+
+logger = logging.getLogger("app.auth.reset_tokens")
+
+
+def issue_password_reset_token(db: Session, user_id: int) -> str:
+    """
+    Store a new reset token for the user and return its plaintext, retiring
+    any earlier unused one so only the latest email works. The caller commits.
+    """
+    now = datetime.utcnow()
+    _retire_pending(db, user_id, now)
+    token = secrets.token_urlsafe(32)
+    db.add(PasswordResetToken(
+        user_id=user_id,
+        token_hash=hash_token(token),
+        expires_at=now + timedelta(minutes=settings.RESET_TOKEN_EXPIRE_MINUTES)
+    ))
+    return token
+
+
+def find_password_reset_token(db: Session, token: str, role: UserRole) -> Optional[PasswordResetToken]:
+    """
+    Return the pending, unexpired reset token for `token` if it belongs to a
+    user of `role`. The lookup is a point query on the digest within the
+    pending-token partial index.
+    """
+    stored = db.query(PasswordResetToken).filter(
+        PasswordResetToken.token_hash == hash_token(token),
+        PasswordResetToken.used_at.is_(None),
+        PasswordResetToken.expires_at > datetime.utcnow()
+    ).first()
+    if stored is None:
+        return None
+    user = db.get(User, stored.user_id)
+    if user is None or user.role != role:
+        return None
+    return stored
+
+
+def spend_password_reset_token(db: Session, stored: PasswordResetToken) -> bool:
+    """
+    Mark a token found by find_password_reset_token as used. Returns False if
+    a concurrent reset spent it first. Kept separate from the lookup so the
+    new password can be hashed before the write transaction starts.
+    The caller commits.
+    """
+    spent = db.execute(
+        update(PasswordResetToken)
+        .where(PasswordResetToken.id == stored.id, PasswordResetToken.used_at.is_(None))
+        .values(used_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    return spent.rowcount == 1
+
+
+def _retire_pending(db: Session, user_id: int, now: datetime) -> None:
+    db.execute(
+        update(PasswordResetToken)
+        .where(PasswordResetToken.user_id == user_id, PasswordResetToken.used_at.is_(None))
+        .values(used_at=now)
+        .execution_options(synchronize_session=False)
+    )
@@ -0,0 +1,193 @@
+import hashlib
+import logging
+import math
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import delete, event, func, inspect, select, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.auth.models import RevokedToken
+from app.core.config import settings
+from app.utils.background import BackgroundRefresh
+
+logger = logging.getLogger("app.auth.revocation")
+
+
+def add_tokens_valid_after_column(engine: Engine) -> None:
+    """create_all() does not alter existing tables, so add users.tokens_valid_after if missing"""
+    columns = {column["name"] for column in inspect(engine).get_columns("users")}
+    if "tokens_valid_after" in columns:
+        return
+
+    logger.info("Adding users.tokens_valid_after column")
+    with engine.begin() as conn:
+        conn.execute(text("ALTER TABLE users ADD COLUMN tokens_valid_after FLOAT"))
+
+
+class BloomFilter:
+    """Fixed-size bloom filter over strings, sized for `capacity` keys at `error_rate`"""
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.size = max(64, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: str) -> Iterable[int]:
+        # Double hashing: k positions from two 64-bit halves of one digest
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        step = int.from_bytes(digest[8:], "little") | 1
+        return ((first + i * step) % self.size for i in range(self.hashes))
+
+    def add(self, key: str) -> None:
+        for position in self._positions(key):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class TokenRevocationList:
+    """
+    Revoked access-token ids (jti), checked on every authenticated request.
+
+    The revoked_tokens table is the source of truth. Each worker mirrors it
+    into a bloom filter plus an exact set of the revoked jtis: a token the
+    filter has never seen, which is nearly every token, is accepted after a
+    few bit probes, and only filter hits are confirmed against the set, so
+    no check does I/O.
+
+    The mirror pulls new rows by id every TOKEN_REVOCATION_SYNC_SECONDS, so
+    a revocation made by another worker applies there within that delay;
+    in the revoking worker it applies as soon as it commits. Rows whose
+    token has expired are pruned every TOKEN_REVOCATION_PRUNE_SECONDS by a
+    background job, which also rebuilds the filter since bloom filters
+    cannot delete; checks keep using the old filter meanwhile.
+    """
+
+    def __init__(self, sync_seconds: float, prune_seconds: float, capacity: int, error_rate: float):
+        self.sync_seconds = sync_seconds
+        self.prune_seconds = prune_seconds
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self._lock = threading.Lock()
+        self._bloom = BloomFilter(capacity, error_rate)
+        self._revoked: Set[str] = set()
+        self._last_id = 0
+        self._synced_at = float("-inf")
+        self._pruned_at = float("-inf")
+        # Revocations added while a rebuild runs, carried over into its filter
+        self._pending: Optional[List[str]] = None
+        self._pruner = BackgroundRefresh("token-revocation-prune", self._prune_and_rebuild)
+
+    def is_revoked(self, db: Session, jti: str) -> bool:
+        if time.monotonic() - self._synced_at >= self.sync_seconds:
+            self.sync(db)
+        return jti in self._bloom and jti in self._revoked
+
+    def revoke(self, db: Session, jti: str, user_id: int, expires_at: datetime) -> None:
+        """Persist a revocation; it applies to this worker once the caller commits"""
+        if jti in self._revoked:
+            return
+        db.add(RevokedToken(jti=jti, user_id=user_id, expires_at=expires_at))
+        db.info.setdefault("revoked_jtis", set()).add(jti)
+
+    def apply(self, jtis: Iterable[str]) -> None:
+        """Mirror committed revocations into this worker without waiting for a sync"""
+        with self._lock:
+            for jti in jtis:
+                self._add(jti)
+
+    def sync(self, db: Session) -> None:
+        """Pull revocations newer than the last seen id; pruning is left to a background job"""
+        with self._lock:
+            now = time.monotonic()
+            if now - self._synced_at < self.sync_seconds:
+                return
+            rows = db.execute(
+                select(RevokedToken.id, RevokedToken.jti)
+                .where(RevokedToken.id > self._last_id)
+            ).all()
+            for row in rows:
+                self._add(row.jti)
+                self._last_id = max(self._last_id, row.id)
+            self._synced_at = now
+
+        if now - self._pruned_at >= self.prune_seconds:
+            self._pruner.trigger()
+
+    def _prune_and_rebuild(self, db: Session) -> None:
+        started = time.perf_counter()
+        with self._lock:
+            self._pending = []
+        try:
+            # The newest row survives so ids keep growing; SQLite would otherwise
+            # reuse its id and workers past it would never fetch the new row
+            newest = db.scalar(select(func.max(RevokedToken.id)))
+            pruned = db.execute(
+                delete(RevokedToken)
+                .where(RevokedToken.expires_at <= datetime.utcnow(), RevokedToken.id != newest)
+            ).rowcount
+            db.commit()
+            rows = db.execute(select(RevokedToken.id, RevokedToken.jti)).all()
+        except Exception:
+            with self._lock:
+                self._pending = None
+            raise
+
+        # Size for growth so the false positive rate holds until the next rebuild.
+        # Built aside and swapped in, since checks read without the lock
+        bloom = BloomFilter(max(self.capacity, 2 * len(rows)), self.error_rate)
+        revoked = {row.jti for row in rows}
+        for jti in revoked:
+            bloom.add(jti)
+        with self._lock:
+            for jti in self._pending:
+                bloom.add(jti)
+                revoked.add(jti)
+            self._pending = None
+            self._bloom, self._revoked = bloom, revoked
+            self._last_id = max(self._last_id, max((row.id for row in rows), default=0))
+            self._pruned_at = time.monotonic()
+        logger.info(
+            f"Token revocation list rebuilt: {len(rows)} revoked, {pruned} expired pruned "
+            f"in {time.perf_counter() - started:.3f}s"
+        )
+
+    def _add(self, jti: str) -> None:
+        self._bloom.add(jti)
+        self._revoked.add(jti)
+        if self._pending is not None:
+            self._pending.append(jti)
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "revoked": len(self._revoked),
+            "bloom_bits": self._bloom.size,
+            "bloom_hashes": self._bloom.hashes,
+            "sync_seconds": self.sync_seconds,
+        }
+
+
+token_revocations = TokenRevocationList(
+    sync_seconds=settings.TOKEN_REVOCATION_SYNC_SECONDS,
+    prune_seconds=settings.TOKEN_REVOCATION_PRUNE_SECONDS,
+    capacity=settings.TOKEN_REVOCATION_BLOOM_CAPACITY,
+    error_rate=settings.TOKEN_REVOCATION_BLOOM_ERROR_RATE
+)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_revocations(session: Session) -> None:
+    jtis = session.info.pop("revoked_jtis", None)
+    if jtis:
+        token_revocations.apply(jtis)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_revocations(session: Session) -> None:
+    session.info.pop("revoked_jtis", None)
@@ -1,16 +1,38 @@
 import logging
+import time
 from datetime import datetime, timedelta
+from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException, status, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
-import secrets
 
+from app.auth.hash_cost import bcrypt_cost
 from app.auth.models import User
-from app.auth.schemas import PasswordResetConfirm, PasswordResetRequest, UserLoginWithRole, Token, UserCreate, UserInDB
+from app.auth.principals import Principal, principal_cache
+from app.auth.provisioning import provision_users
+from app.auth.refresh_tokens import (
+    issue_refresh_token, prune_expired_refresh_tokens, revoke_refresh_token, revoke_user_refresh_tokens,
+    rotate_refresh_token
+)
+from app.auth.revocation import token_revocations
+from app.auth.reset_tokens import find_password_reset_token, issue_password_reset_token, spend_password_reset_token
+from app.auth.schemas import (
+    BulkUserCreateRequest, BulkUserCreateResult, LogoutRequest, PasswordResetConfirm, PasswordResetRequest,
+    RefreshTokenRequest, UserLoginWithRole, Token, UserCreate, UserInDB
+)
+from app.auth.throttle import login_throttle
 from app.core.config import settings
 from app.core.database import get_db
-from app.core.security import create_access_token, verify_password, get_password_hash
-from app.exception import EmailSendError, InvalidCredentialsError, EmailAlreadyRegisteredError, InvalidTokenError
+from app.core.dependencies import get_current_user, get_token_payload, require_admin
+from app.core.security import (
+    bcrypt_rounds, calibrate_bcrypt_rounds, create_access_token, get_password_hash_async, password_hashing_pool,
+    verify_and_update_password_async
+)
+from app.exception import (
+    EmailSendError, InvalidCredentialsError, EmailAlreadyRegisteredError, InvalidTokenError, InactiveUserError,
+    DatabaseError, InvalidInputError, InvalidRefreshTokenError
+)
 from app.utils.email import send_reset_password_email
 
 logger = logging.getLogger("app.auth")
@@ -32,8 +54,9 @@ async def signup(user: UserCreate, db: Session = Depends(get_db)):
             logger.warning(f"Email already registered: {user.email} for role {user.role}")
             raise EmailAlreadyRegisteredError()
 
+        bcrypt_cost.sync(db)
         # Create new user
-        hashed_password = get_password_hash(user.password)
+        hashed_password = await get_password_hash_async(user.password)
         db_user = User(
             email=user.email,
             name=user.name,
@@ -60,6 +83,10 @@ async def login(
     try:
         logger.info(f"Login attempt for: {user_login.email} as {user_login.role}")
 
+        # Before any lookup or bcrypt work, so floods are rejected cheaply
+        client_ip = request.client.host if request.client else "unknown"
+        login_throttle.check(user_login.email, user_login.role.value, client_ip)
+
         user = db.query(User).filter(
             User.email == user_login.email,
             User.role == user_login.role
@@ -69,7 +96,9 @@ async def login(
             logger.warning(f"User not found: {user_login.email} with role {user_login.role}")
             raise InvalidCredentialsError()
 
-        if not verify_password(user_login.password, user.hashed_password):
+        bcrypt_cost.sync(db)
+        valid, new_hash = await verify_and_update_password_async(user_login.password, user.hashed_password)
+        if not valid:
             logger.warning(f"Invalid password for: {user_login.email}")
             raise InvalidCredentialsError()
 
@@ -77,7 +106,14 @@ async def login(
             logger.warning(f"Role mismatch for {user_login.email}: requested {user_login.role}, actual {user.role}")
             raise InvalidCredentialsError()
 
+        login_throttle.succeeded(user_login.email, user_login.role.value)
+        if new_hash:
+            # Stored at an older bcrypt cost; the plaintext is at hand, so upgrade it now
+            logger.info(f"Rehashing password for user {user.id} at cost {bcrypt_rounds()}")
+            user.hashed_password = new_hash
         user.last_login = datetime.utcnow()
+        prune_expired_refresh_tokens(db, user.id)
+        refresh_token = issue_refresh_token(db, user.id)
         db.commit()
 
         access_token = create_access_token(
@@ -90,12 +126,86 @@ async def login(
         )
 
         logger.info(f"Login successful for: {user_login.email}")
-        return {"access_token": access_token, "token_type": "bearer"}
+        return {"access_token": access_token, "refresh_token": refresh_token, "token_type": "bearer"}
 
     except Exception as e:
         logger.error(f"Login failed for {user_login.email}: {str(e)}")
         raise
 
+@router.post("/refresh", response_model=Token)
+async def refresh(
+        request: RefreshTokenRequest,
+        db: Session = Depends(get_db)
+):
+    """Trade a refresh token for a new access token and a rotated refresh token"""
+    try:
+        user_id, refresh_token = rotate_refresh_token(db, request.refresh_token)
+
+        principal = principal_cache.load(db, user_id)
+        if principal is None:
+            raise InvalidRefreshTokenError()
+        if not principal.is_active:
+            raise InactiveUserError()
+        db.commit()
+
+        access_token = create_access_token(
+            data={
+                "sub": principal.email,
+                "role": principal.role.value,
+                "id": principal.id
+            },
+            expires_delta=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+        )
+
+        logger.info(f"Access token refreshed for user {user_id}")
+        return {"access_token": access_token, "refresh_token": refresh_token, "token_type": "bearer"}
+
+    except Exception as e:
+        logger.error(f"Token refresh failed: {str(e)}")
+        raise
+
+@router.post("/logout")
+async def logout(
+        request: Optional[LogoutRequest] = None,
+        payload: dict = Depends(get_token_payload),
+        current_user: Principal = Depends(get_current_user),
+        db: Session = Depends(get_db)
+):
+    """Revoke the access token of this request and, if given, its refresh token"""
+    try:
+        jti = payload.get("jti")
+        if jti:
+            token_revocations.revoke(db, jti, current_user.id, datetime.utcfromtimestamp(payload["exp"]))
+        if request and request.refresh_token:
+            revoke_refresh_token(db, request.refresh_token)
+        db.commit()
+
+        logger.info(f"User {current_user.id} logged out")
+        return {"message": "Logged out"}
+
+    except Exception as e:
+        logger.error(f"Logout failed for user {current_user.id}: {str(e)}")
+        raise
+
+@router.post("/logout-all")
+async def logout_all(
+        current_user: Principal = Depends(get_current_user),
+        db: Session = Depends(get_db)
+):
+    """Sign out every session of the user: all access tokens issued so far and all refresh tokens"""
+    try:
+        user = db.get(User, current_user.id)
+        user.tokens_valid_after = time.time()
+        revoke_user_refresh_tokens(db, user.id)
+        db.commit()
+
+        logger.info(f"User {current_user.id} signed out of all sessions")
+        return {"message": "Signed out of all sessions"}
+
+    except Exception as e:
+        logger.error(f"Logout of all sessions failed for user {current_user.id}: {str(e)}")
+        raise
+
 @router.post("/forgot-password")
 async def forgot_password(
         request: PasswordResetRequest,
@@ -114,9 +224,7 @@ async def forgot_password(
             return {"message": "If the email exists for this role, a reset link has been sent"}
 
 
-        reset_token = secrets.token_urlsafe(32)
-        user.reset_token = reset_token
-        user.reset_token_expires = datetime.utcnow() + timedelta(minutes=15)
+        reset_token = issue_password_reset_token(db, user.id)
         db.commit()
 
         logger.info(f"Reset token generated for: {request.email} ({request.role})")
@@ -142,20 +250,23 @@ async def reset_password(
     try:
         logger.info(f"Password reset attempt with token: {request.token[:6]}...")
 
-        user = db.query(User).filter(
-            User.reset_token == request.token,
-            User.reset_token_expires > datetime.utcnow(),
-            User.role == request.role
-        ).first()
-
-        if not user:
+        stored = find_password_reset_token(db, request.token, request.role)
+        if not stored:
             logger.warning(f"Invalid reset token: {request.token[:6]}...")
             raise InvalidTokenError()
 
+        bcrypt_cost.sync(db)
+        hashed_password = await get_password_hash_async(request.new_password)
+        if not spend_password_reset_token(db, stored):
+            logger.warning(f"Reset token already used: {request.token[:6]}...")
+            raise InvalidTokenError()
+
         # Update password
-        user.hashed_password = get_password_hash(request.new_password)
-        user.reset_token = None
-        user.reset_token_expires = None
+        user = db.get(User, stored.user_id)
+        user.hashed_password = hashed_password
+        # Sessions started with the old password must not outlive it
+        user.tokens_valid_after = time.time()
+        revoke_user_refresh_tokens(db, user.id)
         db.commit()
 
         logger.info(f"Password reset successful for: {user.email}")
@@ -163,4 +274,80 @@ async def reset_password(
 
     except Exception as e:
         logger.error(f"Password reset failed: {str(e)}")
-        raise
\ No newline at end of file
+        raise
+
+@router.get("/admin/password-hashing-stats")
+async def read_password_hashing_stats(
+        current_user: Principal = Depends(require_admin)
+):
+    logger.info(f"Admin {current_user.id} reading password hashing stats")
+    return {**password_hashing_pool.stats(), "bcrypt_rounds": bcrypt_rounds()}
+
+@router.post("/admin/users/bulk", response_model=BulkUserCreateResult)
+async def bulk_create_users(
+        request: BulkUserCreateRequest,
+        db: Session = Depends(get_db),
+        current_user: Principal = Depends(require_admin)
+):
+    try:
+        logger.info(f"Admin {current_user.id} provisioning {len(request.users)} users in bulk")
+
+        # Hashing fans out to worker processes; wait for it off the event loop
+        bcrypt_cost.sync(db)
+        result = await run_in_threadpool(provision_users, db, request.users)
+
+        logger.info(f"Admin {current_user.id} provisioned {result.created} users, {result.existing} already existed")
+        return result
+
+    except Exception as e:
+        logger.error(f"Bulk user provisioning failed: {str(e)}", exc_info=True)
+        db.rollback()
+        raise DatabaseError(detail="Failed to provision users")
+
+@router.post("/admin/password-hashing/calibrate")
+async def calibrate_password_hashing(
+        db: Session = Depends(get_db),
+        current_user: Principal = Depends(require_admin)
+):
+    """
+    Re-measure bcrypt on this worker and store the cost that meets
+    PASSWORD_HASH_TARGET_MS; other workers adopt it within PASSWORD_HASH_SYNC_SECONDS
+    """
+    if settings.PASSWORD_HASH_ROUNDS is not None:
+        raise InvalidInputError("PASSWORD_HASH_ROUNDS is set, so the bcrypt cost is pinned")
+    previous = bcrypt_rounds()
+    rounds = await password_hashing_pool.run(
+        calibrate_bcrypt_rounds,
+        settings.PASSWORD_HASH_TARGET_MS,
+        settings.PASSWORD_HASH_MIN_ROUNDS,
+        settings.PASSWORD_HASH_MAX_ROUNDS
+    )
+    try:
+        bcrypt_cost.store(db, rounds)
+    except Exception as e:
+        logger.error(f"Storing the bcrypt cost failed: {str(e)}")
+        db.rollback()
+        raise DatabaseError(detail="Failed to store the bcrypt cost")
+    logger.info(f"Admin {current_user.id} recalibrated bcrypt cost: {previous} -> {rounds}")
+    return {"previous_rounds": previous, "rounds": rounds, "target_ms": settings.PASSWORD_HASH_TARGET_MS}
+
+@router.get("/admin/principal-cache-stats")
+async def read_principal_cache_stats(
+        current_user: Principal = Depends(require_admin)
+):
+    logger.info(f"Admin {current_user.id} reading principal cache stats")
+    return principal_cache.stats()
+
+@router.get("/admin/login-throttle-stats")
+async def read_login_throttle_stats(
+        current_user: Principal = Depends(require_admin)
+):
+    logger.info(f"Admin {current_user.id} reading login throttle stats")
+    return login_throttle.stats()
+
+@router.get("/admin/token-revocation-stats")
+async def read_token_revocation_stats(
+        current_user: Principal = Depends(require_admin)
+):
+    logger.info(f"Admin {current_user.id} reading token revocation stats")
+    return token_revocations.stats()
@@ -1,5 +1,6 @@
 from enum import Enum
 from datetime import datetime
+from typing import List, Optional
 from pydantic import BaseModel, EmailStr, Field, validator
 
 class UserRole(str, Enum):
@@ -27,6 +28,23 @@ class UserCreate(UserBase):
             raise ValueError("Password must be at least 6 characters")
         return v
 
+class BulkUserCreateRequest(BaseModel):
+    users: List[UserCreate] = Field(..., min_length=1, max_length=1000)
+
+class UserProvisionOutcome(BaseModel):
+    row: int
+    email: str
+    role: UserRole
+    status: str  # created, exists, duplicate or failed
+    id: Optional[int] = None
+    detail: Optional[str] = None
+
+class BulkUserCreateResult(BaseModel):
+    created: int
+    existing: int
+    failed: int
+    results: List[UserProvisionOutcome]
+
 class UserInDB(UserBase):
     id: int
     is_active: bool
@@ -37,8 +55,15 @@ class UserInDB(UserBase):
 
 class Token(BaseModel):
     access_token: str
+    refresh_token: Optional[str] = None
     token_type: str = "bearer"
 
+class RefreshTokenRequest(BaseModel):
+    refresh_token: str
+
+class LogoutRequest(BaseModel):
+    refresh_token: Optional[str] = None
+
 class PasswordResetRequest(BaseModel):
     email: EmailStr
     role:UserRole
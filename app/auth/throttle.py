@@ -0,0 +1,133 @@
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, List
+
+from app.core.config import settings
+from app.exception import TooManyRequestsError
+
+logger = logging.getLogger("app.auth.throttle")
+
+
+class ThrottleStorage(ABC):
+    """
+    Where token buckets live. The in-memory store is per process; a shared
+    implementation (e.g. Redis with a Lua script) only has to make take()
+    atomic per key to enforce the limits across workers.
+    """
+
+    @abstractmethod
+    def take(self, key: str, capacity: float, refill_per_second: float) -> float:
+        """Spend one token from `key`'s bucket; return 0 if allowed, else seconds until one is available"""
+
+    @abstractmethod
+    def reset(self, key: str) -> None:
+        """Refill `key`'s bucket"""
+
+
+class InMemoryThrottleStorage(ThrottleStorage):
+    """
+    Token buckets in an LRU-ordered dict, two floats per key. Once max_keys
+    is reached the least recently used bucket is dropped; an evicted bucket
+    is at worst reset to full, so eviction can only make the limit looser
+    for keys idle long enough to be the oldest.
+    """
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def take(self, key: str, capacity: float, refill_per_second: float) -> float:
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [capacity, now]
+                while len(self._buckets) > self.max_keys:
+                    self._buckets.popitem(last=False)
+                    self.evictions += 1
+            else:
+                self._buckets.move_to_end(key)
+                bucket[0] = min(capacity, bucket[0] + (now - bucket[1]) * refill_per_second)
+                bucket[1] = now
+
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                return 0.0
+            return (1 - bucket[0]) / refill_per_second
+
+    def reset(self, key: str) -> None:
+        with self._lock:
+            self._buckets.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+class LoginThrottle:
+    """
+    Limits sign-in attempts per client IP and per account (email + role)
+    before any password is verified, so a flood of guesses is rejected for
+    the cost of a dict lookup instead of a bcrypt verify each.
+
+    The IP bucket caps what one client can try across many accounts; the
+    account bucket caps guesses against one account from many IPs. A
+    successful sign-in refills the account bucket.
+    """
+
+    def __init__(
+            self,
+            storage: ThrottleStorage,
+            account_burst: int,
+            account_per_minute: float,
+            ip_burst: int,
+            ip_per_minute: float,
+            enabled: bool = True
+    ):
+        self.storage = storage
+        self.account_burst = account_burst
+        self.account_per_minute = account_per_minute
+        self.ip_burst = ip_burst
+        self.ip_per_minute = ip_per_minute
+        self.enabled = enabled
+        self.rejected = 0
+
+    @staticmethod
+    def _account_key(email: str, role: str) -> str:
+        return f"account:{role}:{email.strip().lower()}"
+
+    def check(self, email: str, role: str, client_ip: str) -> None:
+        """Consume one attempt for the IP and the account, or raise TooManyRequestsError"""
+        if not self.enabled:
+            return
+        wait = self.storage.take(f"ip:{client_ip}", self.ip_burst, self.ip_per_minute / 60)
+        if not wait:
+            wait = self.storage.take(self._account_key(email, role), self.account_burst, self.account_per_minute / 60)
+        if wait:
+            self.rejected += 1
+            logger.warning(f"Sign-in throttled for {email} ({role}) from {client_ip}, retry in {wait:.0f}s")
+            raise TooManyRequestsError(retry_after=int(wait) + 1)
+
+    def succeeded(self, email: str, role: str) -> None:
+        if self.enabled:
+            self.storage.reset(self._account_key(email, role))
+
+    def stats(self) -> Dict[str, Any]:
+        stats = {"enabled": self.enabled, "rejected": self.rejected}
+        if isinstance(self.storage, InMemoryThrottleStorage):
+            stats.update(keys=len(self.storage), max_keys=self.storage.max_keys, evictions=self.storage.evictions)
+        return stats
+
+
+login_throttle = LoginThrottle(
+    storage=InMemoryThrottleStorage(max_keys=settings.LOGIN_THROTTLE_MAX_KEYS),
+    account_burst=settings.LOGIN_THROTTLE_ACCOUNT_BURST,
+    account_per_minute=settings.LOGIN_THROTTLE_ACCOUNT_PER_MINUTE,
+    ip_burst=settings.LOGIN_THROTTLE_IP_BURST,
+    ip_per_minute=settings.LOGIN_THROTTLE_IP_PER_MINUTE,
+    enabled=settings.LOGIN_THROTTLE_ENABLED
+)
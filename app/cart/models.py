@@ -1,10 +1,14 @@
-from sqlalchemy import Column, Integer, ForeignKey
+from sqlalchemy import Column, Integer, ForeignKey, Index
 from sqlalchemy.orm import relationship
 
 from app.core.database import Base
 
 class CartItem(Base):
     __tablename__ = "cart_items"
+    __table_args__ = (
+        # Cart reads filter on user_id; mutations look up (user_id, product_id)
+        Index("ix_cart_items_user_product", "user_id", "product_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
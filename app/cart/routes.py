@@ -1,8 +1,9 @@
 import logging
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session, contains_eager
 
-from app.auth.models import User
+from app.auth.principals import Principal
 from app.core.database import get_db
 from app.core.dependencies import get_current_user, require_user
 from app.cart.models import CartItem
@@ -15,11 +16,41 @@ logger = logging.getLogger("app.cart")
 
 router = APIRouter(prefix="/cart", tags=["cart"])
 
+
+def load_cart(db: Session, user_id: int) -> CartResponse:
+    """
+    Build the cart response in one query, whatever the cart size.
+
+    Each row carries the cart item, its product (so serializing item.product
+    needs no lazy load) and the cart totals as window aggregates over the
+    user's rows. Items whose product no longer exists are left out.
+    """
+    rows = db.execute(
+        select(
+            CartItem,
+            func.count().over().label("total_items"),
+            func.sum(Product.price * CartItem.quantity).over().label("total_price")
+        )
+        .join(CartItem.product)
+        .options(contains_eager(CartItem.product))
+        .where(CartItem.user_id == user_id)
+        .order_by(CartItem.id)
+    ).all()
+
+    if not rows:
+        return CartResponse(items=[], total_items=0, total_price=0.0)
+    return CartResponse(
+        items=[row.CartItem for row in rows],
+        total_items=rows[0].total_items,
+        total_price=rows[0].total_price
+    )
+
+
 @router.post("", response_model=CartResponse)
 async def add_to_cart(
         item: CartItemCreate,
         db: Session = Depends(get_db),
-        current_user: User = Depends(require_user)
+        current_user: Principal = Depends(require_user)
 ):
     """Add item to cart with proper inventory validation"""
     try:
@@ -76,27 +107,15 @@ async def add_to_cart(
 @router.get("", response_model=CartResponse)
 async def view_cart(
         db: Session = Depends(get_db),
-        current_user: User = Depends(require_user)
+        current_user: Principal = Depends(require_user)
 ):
     """Retrieve user's cart contents"""
     try:
         logger.info(f"Viewing cart for user {current_user.id}")
 
-        cart_items = db.query(CartItem).filter(
-            CartItem.user_id == current_user.id
-        ).all()
-
-        # Calculate totals
-        total_price = sum(item.product.price * item.quantity for item in cart_items)
-        total_items = len(cart_items)
-
-        logger.info(f"Cart retrieved: {total_items} items, total: ${total_price:.2f}")
-
-        return CartResponse(
-            items=cart_items,
-            total_items=total_items,
-            total_price=total_price
-        )
+        cart = load_cart(db, current_user.id)
+        logger.info(f"Cart retrieved: {cart.total_items} items, total: ${cart.total_price:.2f}")
+        return cart
 
     except Exception as e:
         logger.exception(f"Failed to retrieve cart: {str(e)}")
@@ -110,7 +129,7 @@ async def update_cart_item(
         product_id: int,
         item: CartItemUpdate,
         db: Session = Depends(get_db),
-        current_user: User = Depends(require_user)
+        current_user: Principal = Depends(require_user)
 ):
     """Update cart item quantity with validation"""
     try:
@@ -159,7 +178,7 @@ async def update_cart_item(
 async def remove_from_cart(
         product_id: int,
         db: Session = Depends(get_db),
-        current_user: User = Depends(require_user)
+        current_user: Principal = Depends(require_user)
 ):
     """Remove item from cart"""
     try:
@@ -14,6 +14,63 @@ class Settings(BaseSettings):
     # Database
     SQLALCHEMY_DATABASE_URI: str = "sqlite:///./ecommerce.db"
 
+    # Product catalog cache
+    CATALOG_CACHE_MAX_ENTRIES: int = 10000
+    CATALOG_CACHE_TTL_SECONDS: int = 60
+
+    # Serve product listings from the in-memory columnar index instead of SQL
+    COLUMNAR_CATALOG_ENABLED: bool = False
+
+    # Bestseller leaderboard
+    LEADERBOARD_WINDOW_DAYS: int = 7
+    # How often each worker reloads the rankings to pick up other workers' sales
+    LEADERBOARD_RELOAD_SECONDS: int = 300
+
+    # Recommendations
+    RECOMMENDATIONS_TOP_K: int = 20
+    COOCCURRENCE_REFRESH_SECONDS: int = 300
+    COOCCURRENCE_MAX_BASKET: int = 100
+
+    # Autocomplete
+    AUTOCOMPLETE_TOP_K: int = 10
+    AUTOCOMPLETE_REBUILD_SECONDS: int = 300
+
+    # Live product updates (Server-Sent Events)
+    PRODUCT_STREAM_KEEPALIVE_SECONDS: int = 15
+    PRODUCT_STREAM_MAX_IDS: int = 100
+
+    # Authenticated principal cache
+    PRINCIPAL_CACHE_MAX_ENTRIES: int = 10000
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 60
+
+    # Access token revocation (logout)
+    TOKEN_REVOCATION_SYNC_SECONDS: int = 10
+    TOKEN_REVOCATION_PRUNE_SECONDS: int = 3600
+    TOKEN_REVOCATION_BLOOM_CAPACITY: int = 100000
+    TOKEN_REVOCATION_BLOOM_ERROR_RATE: float = 0.001
+
+    # Sign-in throttling (token buckets per account and per client IP)
+    LOGIN_THROTTLE_ENABLED: bool = True
+    LOGIN_THROTTLE_ACCOUNT_BURST: int = 5
+    LOGIN_THROTTLE_ACCOUNT_PER_MINUTE: float = 2
+    LOGIN_THROTTLE_IP_BURST: int = 30
+    LOGIN_THROTTLE_IP_PER_MINUTE: float = 30
+    LOGIN_THROTTLE_MAX_KEYS: int = 100000
+
+    # Password hashing pool
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_QUEUE_LIMIT: int = 64
+    # bcrypt cost; when unset it is calibrated once to the target latency and
+    # stored in the database for every worker
+    PASSWORD_HASH_ROUNDS: Optional[int] = Field(None, ge=4, le=31)
+    PASSWORD_HASH_TARGET_MS: float = 200
+    PASSWORD_HASH_MIN_ROUNDS: int = Field(10, ge=4, le=31)
+    PASSWORD_HASH_MAX_ROUNDS: int = Field(15, ge=4, le=31)
+    # How often a worker checks for a cost recalibrated by another worker
+    PASSWORD_HASH_SYNC_SECONDS: float = 60
+    # Processes hashing passwords during bulk user provisioning; defaults to all cores
+    PROVISIONING_HASH_PROCESSES: Optional[int] = None
+
     # Email
     SMTP_SERVER: Optional[str] = None
     SMTP_PORT: Optional[int] = None
@@ -12,6 +12,12 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
+def create_missing_indexes():
+    """create_all() skips existing tables, so add indexes declared after they were created"""
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+
 def get_db():
     db = SessionLocal()
     try:
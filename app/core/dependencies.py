@@ -8,7 +8,8 @@ import logging
 
 from app.core.config import settings
 from app.core.database import get_db
-from app.auth.models import User
+from app.auth.principals import Principal, principal_cache
+from app.auth.revocation import token_revocations
 from app.auth.schemas import UserRole
 from app.core.security import decode_token
 from app.exception import InactiveUserError
@@ -20,48 +21,59 @@ logger = logging.getLogger(__name__)
 
 bearer_scheme = APIKeyHeader(name="Authorization", scheme_name="Bearer")
 
-async def get_current_user(
-        token: str = Depends(bearer_scheme),
-        db: Session = Depends(get_db)
-) -> User:
-    # Remove the "Bearer " prefix if present
-    if token.startswith("Bearer "):
-        token = token[7:]
-
-    credentials_exception = HTTPException(
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
 
+async def get_token_payload(token: str = Depends(bearer_scheme)) -> dict:
+    """Decoded claims of the request's access token"""
+    # Remove the "Bearer " prefix if present
+    if token.startswith("Bearer "):
+        token = token[7:]
+
     try:
-        payload = jwt.decode(
+        return jwt.decode(
             token,
             settings.SECRET_KEY,
             algorithms=[settings.ALGORITHM]
         )
-        # Extract all necessary claims
-        email: str = payload.get("sub")
-        role_str: str = payload.get("role")
-        user_id: int = payload.get("id")
-
-        if None in (email, role_str, user_id):
-            logger.error("Missing required claims in token")
-            raise credentials_exception
-
-        # Convert role string to enum
-        try:
-            role = UserRole(role_str)
-        except ValueError:
-            logger.error(f"Invalid role in token: {role_str}")
-            raise credentials_exception
-
     except JWTError as e:
         logger.error(f"JWT Error: {str(e)}")
+        raise _credentials_exception()
+
+async def get_current_user(
+        payload: dict = Depends(get_token_payload),
+        db: Session = Depends(get_db)
+) -> Principal:
+    credentials_exception = _credentials_exception()
+
+    # Extract all necessary claims
+    email: str = payload.get("sub")
+    role_str: str = payload.get("role")
+    user_id: int = payload.get("id")
+
+    if None in (email, role_str, user_id):
+        logger.error("Missing required claims in token")
         raise credentials_exception
 
-    # Get user by ID
-    user = db.query(User).filter(User.id == user_id).first()
+    # Convert role string to enum
+    try:
+        role = UserRole(role_str)
+    except ValueError:
+        logger.error(f"Invalid role in token: {role_str}")
+        raise credentials_exception
+
+    # In-memory check; tokens issued before jti existed just run to expiry
+    jti = payload.get("jti")
+    if jti and token_revocations.is_revoked(db, jti):
+        logger.warning(f"Revoked token used for user ID: {user_id}")
+        raise credentials_exception
+
+    # Get user by ID, usually from the principal cache
+    user = principal_cache.load(db, user_id)
 
     # Additional verification
     if not user:
@@ -73,12 +85,15 @@ async def get_current_user(
     if user.role != role:
         logger.error(f"Role mismatch: token role {role}, user role {user.role}")
         raise credentials_exception
+    if user.tokens_valid_after is not None and payload.get("iat", 0) < user.tokens_valid_after:
+        logger.warning(f"Token issued before sign-out everywhere for user ID: {user_id}")
+        raise credentials_exception
 
     return user
 
 async def get_current_active_user(
-        current_user: User = Depends(get_current_user)
-) -> User:
+        current_user: Principal = Depends(get_current_user)
+) -> Principal:
     """Verify the user is active"""
     if not current_user.is_active:
         logger.error(f"User {current_user.email} is inactive")
@@ -86,8 +101,8 @@ async def get_current_active_user(
     return current_user
 
 async def require_admin(
-        current_user: User = Depends(get_current_active_user)
-) -> User:
+        current_user: Principal = Depends(get_current_active_user)
+) -> Principal:
     if current_user.role != UserRole.admin:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -96,8 +111,8 @@ async def require_admin(
     return current_user
 
 async def require_user(
-        current_user: User = Depends(get_current_active_user)
-) -> User:
+        current_user: Principal = Depends(get_current_active_user)
+) -> Principal:
     if current_user.role != UserRole.user:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
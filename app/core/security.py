@@ -1,22 +1,79 @@
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Any, Callable, Dict, Optional, Tuple
+import asyncio
+import hashlib
+import math
+import secrets
 import logging
+import statistics
+import threading
+import time
 import bcrypt
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import HTTPException, status
 
 from app.core.config import settings
+from app.exception import ServiceBusyError
 
 logger = logging.getLogger(__name__)
 
 # Password hashing context
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# bcrypt's cost is log2 of its iteration count, so each step doubles hash time
+_bcrypt_rounds = pwd_context.handler("bcrypt").default_rounds
+
+def bcrypt_rounds() -> int:
+    return _bcrypt_rounds
+
+def set_bcrypt_rounds(rounds: int) -> None:
+    """
+    Hash new passwords at `rounds` and flag hashes below it for a rehash.
+
+    Only a minimum is set, so hashes at a higher cost (e.g. from before a
+    recalibration picked a lower one) are kept rather than rehashed downward.
+    """
+    global _bcrypt_rounds
+    pwd_context.update(bcrypt__default_rounds=rounds, bcrypt__min_rounds=rounds)
+    _bcrypt_rounds = rounds
+
+def measure_bcrypt_seconds(rounds: int, samples: int = 3) -> float:
+    """Median wall time of one bcrypt hash at `rounds` on this machine"""
+    timings = []
+    for _ in range(samples):
+        salt = bcrypt.gensalt(rounds=rounds)
+        started = time.perf_counter()
+        bcrypt.hashpw(b"calibration-password", salt)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+def calibrate_bcrypt_rounds(target_ms: float, min_rounds: int, max_rounds: int) -> int:
+    """
+    Highest cost whose hash time stays within `target_ms`, clamped to
+    [min_rounds, max_rounds].
+
+    Each extra round doubles the work, so one measurement at min_rounds
+    predicts every other cost; the prediction is then checked once and
+    stepped down if it overshoots (e.g. turbo clocks at the first sample).
+    """
+    baseline = measure_bcrypt_seconds(min_rounds) * 1000
+    extra = int(math.log2(target_ms / baseline)) if baseline < target_ms else 0
+    rounds = max(min_rounds, min(max_rounds, min_rounds + extra))
+    while rounds > min_rounds and measure_bcrypt_seconds(rounds, samples=1) * 1000 > target_ms * 1.25:
+        rounds -= 1
+    return rounds
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash"""
     return pwd_context.verify(plain_password, hashed_password)
 
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify a password; on success also return a new hash if the stored one has an outdated cost"""
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
 def get_password_hash(password: str) -> str:
     """Generate a password hash"""
     try:
@@ -25,7 +82,7 @@ def get_password_hash(password: str) -> str:
         logger.error(f"Password hashing error: {str(e)}")
         try:
             # Fallback to direct bcrypt
-            hashed = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
+            hashed = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=_bcrypt_rounds))
             return hashed.decode('utf-8')
         except Exception as bcrypt_e:
             logger.error(f"BCrypt fallback failed: {str(bcrypt_e)}")
@@ -34,6 +91,102 @@ def get_password_hash(password: str) -> str:
                 detail="Error hashing password"
             )
 
+class PasswordHashingPool:
+    """
+    Bounded thread pool for bcrypt work, so hashing never runs on the event loop.
+
+    bcrypt releases the GIL while it hashes, so threads give real parallelism
+    without the pickling and start-up cost of a process pool. At most
+    `workers` hashes run at once and at most `queue_limit` more wait for a
+    worker; beyond that requests are rejected with a 503 instead of piling up
+    latency for everyone. Queue wait time is recorded for every job.
+    """
+
+    def __init__(self, workers: int, queue_limit: int):
+        self.workers = workers
+        self.queue_limit = queue_limit
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+        self._lock = threading.Lock()
+        self._pending = 0
+        # Recent waits for percentiles; totals cover the whole process lifetime
+        self._waits: deque = deque(maxlen=1024)
+        self.started = 0
+        self.completed = 0
+        self.rejected = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    async def run(self, fn: Callable[..., Any], *args) -> Any:
+        with self._lock:
+            if self._pending >= self.workers + self.queue_limit:
+                self.rejected += 1
+                logger.warning(f"Password hashing queue full ({self._pending} pending), rejecting request")
+                raise ServiceBusyError()
+            self._pending += 1
+
+        submitted = time.perf_counter()
+
+        def job():
+            self._record_wait(time.perf_counter() - submitted)
+            return fn(*args)
+
+        future = self._executor.submit(job)
+        # Released when the job finishes or is cancelled before it started,
+        # even if the awaiting request went away in the meantime
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    def _record_wait(self, waited: float) -> None:
+        with self._lock:
+            self._waits.append(waited)
+            self.started += 1
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+
+    def _release(self, future: Future) -> None:
+        with self._lock:
+            self._pending -= 1
+            if not future.cancelled():
+                self.completed += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            waits = sorted(self._waits)
+            return {
+                "workers": self.workers,
+                "queue_limit": self.queue_limit,
+                "pending": self._pending,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "wait_ms_avg": round(self.total_wait / self.started * 1000, 3) if self.started else 0.0,
+                "wait_ms_p50": round(waits[len(waits) // 2] * 1000, 3) if waits else 0.0,
+                "wait_ms_p95": round(waits[int(len(waits) * 0.95)] * 1000, 3) if waits else 0.0,
+                "wait_ms_max": round(self.max_wait * 1000, 3),
+            }
+
+
+password_hashing_pool = PasswordHashingPool(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    queue_limit=settings.PASSWORD_HASH_QUEUE_LIMIT
+)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password against its hash on the hashing pool"""
+    return await password_hashing_pool.run(verify_password, plain_password, hashed_password)
+
+async def verify_and_update_password_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """verify_and_update_password on the hashing pool"""
+    return await password_hashing_pool.run(verify_and_update_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    """Generate a password hash on the hashing pool"""
+    return await password_hashing_pool.run(get_password_hash, password)
+
+def hash_token(token: str) -> str:
+    """Digest of a random bearer secret (refresh or reset token) for storage and lookup"""
+    # Tokens carry 256 bits of randomness, so a fast unsalted digest is enough
+    return hashlib.sha256(token.encode()).hexdigest()
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token"""
     try:
@@ -41,7 +194,11 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
         expire = datetime.utcnow() + (expires_delta or timedelta(minutes=15))
         to_encode.update({"exp": expire,"sub": to_encode.get("sub", ""),
                           "role": to_encode.get("role", ""),
-                          "id": to_encode.get("id", 0)})
+                          "id": to_encode.get("id", 0),
+                          # jti identifies the token for revocation; the
+                          # fractional iat orders it against sign-out-everywhere
+                          "jti": secrets.token_hex(16),
+                          "iat": time.time()})
 
         if not all([to_encode.get("sub"), to_encode.get("role"), to_encode.get("id")]):
             raise ValueError("Missing required token claims")
@@ -1,13 +1,14 @@
 from fastapi import HTTPException, status
 from fastapi import HTTPException, status
 import logging
+from typing import Dict, Optional
 
 logger = logging.getLogger("app.exception")
 
 class BaseAPIException(HTTPException):
     """Base exception class with built-in logging"""
-    def __init__(self, status_code: int, detail: str, log_level: str = "error"):
-        super().__init__(status_code=status_code, detail=detail)
+    def __init__(self, status_code: int, detail: str, log_level: str = "error", headers: Optional[Dict[str, str]] = None):
+        super().__init__(status_code=status_code, detail=detail, headers=headers)
         # Log exception with appropriate level
         log_method = getattr(logger, log_level, logger.error)
         log_method(f"{self.__class__.__name__}: {detail}")
@@ -66,6 +67,13 @@ class ProductNotFoundError(HTTPException):
             detail="Product not found"
         )
 
+class CategoryNotFoundError(HTTPException):
+    def __init__(self):
+        super().__init__(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Category not found"
+        )
+
 class InvalidTokenError(HTTPException):
     def __init__(self):
         super().__init__(
@@ -73,6 +81,14 @@ class InvalidTokenError(HTTPException):
             detail="Invalid or expired token"
         )
 
+class InvalidRefreshTokenError(HTTPException):
+    def __init__(self):
+        super().__init__(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired refresh token",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+
 class EmptyCartError(HTTPException):
     def __init__(self):
         super().__init__(
@@ -111,10 +127,26 @@ class DatabaseError(HTTPException):
         )
 
 
-class InvalidInputError:
+class InvalidInputError(HTTPException):
     def __init__(self, detail: str = "Invalid input provided"):
         super().__init__(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=detail
         )
-    pass
\ No newline at end of file
+
+
+class ServiceBusyError(HTTPException):
+    def __init__(self, detail: str = "Server is busy, please retry shortly", retry_after: int = 1):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=detail,
+            headers={"Retry-After": str(retry_after)}
+        )
+
+class TooManyRequestsError(HTTPException):
+    def __init__(self, detail: str = "Too many attempts, please retry later", retry_after: int = 60):
+        super().__init__(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=detail,
+            headers={"Retry-After": str(retry_after)}
+        )
@@ -3,10 +3,16 @@ from pathlib import Path
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from app.auth.hash_cost import bcrypt_cost
+from app.auth.revocation import add_tokens_valid_after_column
 from app.auth.routes import router as auth_router
-from app.core.database import Base, engine
+from app.core.database import Base, SessionLocal, engine, create_missing_indexes
 from app.products.routes import router as products_router
+from app.products.categories import add_category_column, init_categories
+from app.products.search import init_search_index
+from app.products.versions import init_catalog_versions
 from app.cart.routes import router as cart_router
+from app.orders.leaderboard import leaderboard
 from app.orders.routes import router as orders_router
 from app.utils.logging import setup_logging
 from app.core.error_handlers import register_error_handlers
@@ -44,11 +50,29 @@ except Exception as e:
 try:
     logger.info("Creating database tables...")
     Base.metadata.create_all(bind=engine)
+    add_category_column(engine)
+    add_tokens_valid_after_column(engine)
+    create_missing_indexes()
+    init_search_index(engine)
+    init_catalog_versions(engine)
+    init_categories(engine)
     logger.info("Database tables created successfully")
 except Exception as e:
     logger.exception("Failed to create database tables")
     raise
 
+# Before serving; only the first start on a fresh database calibrates, later
+# starts and other workers read the stored cost
+with SessionLocal() as db:
+    bcrypt_cost.load(db)
+
+# Likewise the bestseller aggregate, so no request runs it
+try:
+    with SessionLocal() as db:
+        leaderboard.warm(db)
+except Exception:
+    logger.exception("Failed to load the leaderboard; it will load on first read")
+
 app = FastAPI(
     title="E-Commerce API",
     version="1.0.0",
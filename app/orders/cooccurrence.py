@@ -0,0 +1,177 @@
+import logging
+import threading
+import time
+from typing import List, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.orders.models import Order, OrderItem
+from app.utils.background import BackgroundRefresh
+
+logger = logging.getLogger("app.orders.cooccurrence")
+
+_EMPTY = np.empty(0, dtype=np.int64)
+
+
+def _sorted_unique(keys: np.ndarray) -> np.ndarray:
+    keys = np.sort(keys)
+    return keys[np.r_[True, keys[1:] != keys[:-1]]]
+
+
+def _sorted_counts(keys: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """np.unique(..., return_counts=True) via sort + run boundaries, which is much faster on int64"""
+    keys = np.sort(keys)
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    return keys[starts], np.diff(np.r_[starts, keys.size])
+
+
+def basket_pairs(order_ids: np.ndarray, product_ids: np.ndarray, max_basket: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Count ordered (a, b) product pairs bought in the same order.
+
+    Pairs are packed into int64 keys (a << 32 | b) and returned sorted with
+    their counts. Everything is vectorized: within each basket (products sorted
+    ascending) every member expands to the members after it via repeat/arange
+    arithmetic, giving the a < b half of the matrix, which is then mirrored.
+    Baskets larger than max_basket are skipped to bound the quadratic blow-up.
+    """
+    if order_ids.size == 0:
+        return _EMPTY, _EMPTY
+
+    lines = _sorted_unique((order_ids << 32) | product_ids)
+    orders, products = lines >> 32, lines & 0xFFFFFFFF
+
+    starts = np.flatnonzero(np.r_[True, orders[1:] != orders[:-1]])
+    sizes = np.diff(np.r_[starts, orders.size])
+    basket_of = np.repeat(np.arange(starts.size), sizes)
+
+    members = np.flatnonzero(((sizes > 1) & (sizes <= max_basket))[basket_of])
+    followers = starts[basket_of[members]] + sizes[basket_of[members]] - 1 - members
+    members, followers = members[followers > 0], followers[followers > 0]
+    if members.size == 0:
+        return _EMPTY, _EMPTY
+
+    left = np.repeat(members, followers)
+    right = left + 1 + np.arange(left.size) - np.repeat(np.cumsum(followers) - followers, followers)
+    upper, counts = _sorted_counts((products[left] << 32) | products[right])
+
+    lower = ((upper & 0xFFFFFFFF) << 32) | (upper >> 32)
+    keys = np.concatenate([upper, lower])
+    order = np.argsort(keys, kind="stable")
+    return keys[order], np.concatenate([counts, counts])[order]
+
+
+class CooccurrenceIndex:
+    """
+    "Frequently bought together" neighbours from order_items.
+
+    Holds the sparse pair-count matrix as sorted (key, count) arrays plus a
+    CSR-style top-k neighbour list per product, so a lookup is a binary search
+    and a slice. Refreshes are incremental: only order lines above the last
+    seen OrderItem.id are read and merged into the existing counts. They run
+    in a background thread, and lookups keep answering from the previous
+    snapshot (or with no neighbours before the first refresh finishes).
+    """
+
+    def __init__(self, top_k: int, refresh_seconds: int, max_basket: int):
+        self.top_k = top_k
+        self.refresh_seconds = refresh_seconds
+        self.max_basket = max_basket
+        self._lock = threading.Lock()
+        self._refresher = BackgroundRefresh("cooccurrence-refresh", self.refresh)
+        self._clear()
+
+    def neighbours(self, product_id: int, limit: int) -> List[Tuple[int, int]]:
+        """Return up to `limit` (product_id, times_bought_together) pairs"""
+        if time.monotonic() - self._refreshed_at >= self.refresh_seconds:
+            self._refresher.trigger()
+
+        # Swapped as one tuple on refresh, so readers never mix two generations
+        products, indptr, neighbours, scores = self._top_k
+        position = np.searchsorted(products, product_id)
+        if position == products.size or products[position] != product_id:
+            return []
+        start, end = indptr[position], min(indptr[position + 1], indptr[position] + limit)
+        return list(zip(neighbours[start:end].tolist(), scores[start:end].tolist()))
+
+    def refresh(self, db: Session) -> None:
+        with self._lock:
+            if time.monotonic() - self._refreshed_at < self.refresh_seconds:
+                return
+            started = time.perf_counter()
+
+            # Lines of one order commit together, so an id watermark never splits a basket
+            rows = db.execute(
+                select(OrderItem.id, OrderItem.order_id, OrderItem.product_id)
+                .join(Order, OrderItem.order_id == Order.id)
+                .where(OrderItem.id > self._last_item_id, Order.status == "completed")
+            ).all()
+
+            if rows:
+                lines = np.array(rows, dtype=np.int64)
+                keys, counts = basket_pairs(lines[:, 1], lines[:, 2], self.max_basket)
+                self._merge(keys, counts)
+                self._last_item_id = int(lines[:, 0].max())
+
+            self._refreshed_at = time.monotonic()
+            logger.info(
+                f"Co-occurrence refreshed with {len(rows)} new order lines: "
+                f"{self._keys.size} pairs in {time.perf_counter() - started:.3f}s"
+            )
+
+    def reset(self) -> None:
+        with self._lock:
+            self._clear()
+
+    def _clear(self) -> None:
+        self._keys = _EMPTY
+        self._counts = _EMPTY
+        self._top_k = (_EMPTY, np.zeros(1, dtype=np.int64), _EMPTY, _EMPTY)
+        self._last_item_id = 0
+        self._refreshed_at = float("-inf")
+
+    def _merge(self, keys: np.ndarray, counts: np.ndarray) -> None:
+        """Merge sorted new pair counts into the sorted existing arrays without a full re-sort"""
+        if keys.size == 0:
+            return
+        if self._keys.size == 0:
+            self._keys, self._counts = keys, counts
+        else:
+            positions = np.searchsorted(self._keys, keys)
+            clipped = np.minimum(positions, self._keys.size - 1)
+            existing = self._keys[clipped] == keys
+
+            merged_counts = self._counts.copy()
+            merged_counts[clipped[existing]] += counts[existing]
+            fresh = ~existing
+            self._keys = np.insert(self._keys, positions[fresh], keys[fresh])
+            self._counts = np.insert(merged_counts, positions[fresh], counts[fresh])
+        self._rebuild_top_k()
+
+    def _rebuild_top_k(self) -> None:
+        first = self._keys >> 32
+        # Keys are sorted by (first, second); a stable sort on (first, -count)
+        # keeps `second` ascending among equal counts
+        order = np.argsort((first << 32) | (0x7FFFFFFF - self._counts), kind="stable")
+        first, second, counts = first[order], self._keys[order] & 0xFFFFFFFF, self._counts[order]
+
+        starts = np.flatnonzero(np.r_[True, first[1:] != first[:-1]])
+        lengths = np.diff(np.r_[starts, first.size])
+        keep = np.arange(first.size) - np.repeat(starts, lengths) < self.top_k
+
+        self._top_k = (
+            first[starts],
+            np.r_[0, np.cumsum(np.minimum(lengths, self.top_k))],
+            second[keep],
+            counts[keep],
+        )
+
+
+cooccurrence_index = CooccurrenceIndex(
+    top_k=settings.RECOMMENDATIONS_TOP_K,
+    refresh_seconds=settings.COOCCURRENCE_REFRESH_SECONDS,
+    max_basket=settings.COOCCURRENCE_MAX_BASKET
+)
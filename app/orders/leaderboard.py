@@ -0,0 +1,245 @@
+import logging
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import defaultdict, deque
+from datetime import datetime, timedelta
+from typing import Deque, Dict, List, Optional, Tuple
+
+from sqlalchemy import Integer, String, cast, func, select, type_coerce
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.orders.models import Order, OrderItem
+from app.products.models import Product
+from app.utils.background import BackgroundRefresh
+from app.utils.helpers import to_db_timestamp
+
+logger = logging.getLogger("app.orders.leaderboard")
+
+BUCKET_SECONDS = 3600
+
+# Ranking scopes: (window, category_id). category_id None ranks the whole catalog.
+ALL_TIME = "all"
+ROLLING = "window"
+
+
+class _Ranking:
+    """Sales counts kept in descending order, so top-N is a slice"""
+
+    def __init__(self):
+        self._counts: Dict[int, int] = {}
+        self._order: List[Tuple[int, int]] = []  # (-units, product_id), best first
+
+    def add(self, product_id: int, units: int) -> None:
+        old = self._counts.get(product_id, 0)
+        new = old + units
+        if old:
+            del self._order[bisect_left(self._order, (-old, product_id))]
+        if new > 0:
+            self._counts[product_id] = new
+            insort(self._order, (-new, product_id))
+        else:
+            self._counts.pop(product_id, None)
+
+    @property
+    def counts(self) -> Dict[int, int]:
+        return self._counts
+
+    def top(self, limit: int) -> List[Tuple[int, int]]:
+        return [(product_id, -units) for units, product_id in self._order[:limit]]
+
+
+class Leaderboard:
+    """
+    Bestseller rankings overall, per category, all-time and over a rolling window.
+
+    Checkout feeds this process's sales in as they are written. The rolling
+    window is made of hourly buckets; when a bucket ages out its units are
+    subtracted from the window rankings, so reads never aggregate
+    order_items. State is loaded from the database with one grouped query by
+    warm() at startup, or on the first read in a process that skipped it;
+    checkout never runs the load. Every reload_seconds a read starts a reload
+    in a background thread, which picks up other workers' sales; reads keep
+    using the current rankings until the reloaded ones are swapped in.
+    """
+
+    def __init__(self, window_days: int, reload_seconds: int):
+        self.window_days = window_days
+        self.window_buckets = window_days * 24
+        self.reload_seconds = reload_seconds
+        self._rankings: Dict[Tuple[str, Optional[int]], _Ranking] = defaultdict(_Ranking)
+        self._buckets: Deque[Tuple[int, Dict[Tuple[int, Optional[int]], int]]] = deque()
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._loaded_at = float("-inf")
+        # Sales recorded while a reload runs, replayed unless the reload read their order
+        self._pending: Optional[List[Tuple[int, Optional[int], int, Optional[float], Optional[int]]]] = None
+        self._reloader = BackgroundRefresh("leaderboard-reload", self.reload)
+
+    def warm(self, db: Session) -> None:
+        """Load the rankings now, so no request pays for the aggregate query"""
+        self._ensure_loaded(db)
+
+    def record(
+            self,
+            product_id: int,
+            category_id: Optional[int],
+            units: int,
+            at: Optional[float] = None,
+            order_id: Optional[int] = None
+    ) -> None:
+        with self._lock:
+            if self._pending is not None:
+                self._pending.append((product_id, category_id, units, at, order_id))
+            if not self._loaded:
+                # The load, whenever it runs, reads committed orders, which include this sale
+                return
+            self._record(product_id, category_id, units, at)
+
+    def reload(self, db: Session) -> None:
+        """Rebuild the rankings from order_items and swap them in, keeping sales recorded meanwhile"""
+        with self._lock:
+            if time.monotonic() - self._loaded_at < self.reload_seconds:
+                return
+            self._pending = []
+        try:
+            # Loaded into a fresh instance so the current rankings keep serving reads
+            fresh = Leaderboard(self.window_days, self.reload_seconds)
+            through_order_id = fresh._load(db)
+        except Exception:
+            with self._lock:
+                self._pending = None
+            raise
+
+        with self._lock:
+            pending, self._pending = self._pending, None
+            self._rankings, self._buckets = fresh._rankings, fresh._buckets
+            for product_id, category_id, units, at, order_id in pending:
+                if order_id is None or order_id > through_order_id:
+                    self._record(product_id, category_id, units, at)
+            self._loaded = True
+            self._loaded_at = time.monotonic()
+
+    def top(
+            self,
+            db: Session,
+            limit: int,
+            window: str = ALL_TIME,
+            category_id: Optional[int] = None
+    ) -> List[Tuple[int, int]]:
+        """Return up to `limit` (product_id, units_sold) pairs, best seller first"""
+        self._ensure_loaded(db)
+        with self._lock:
+            if window == ROLLING:
+                self._expire(int(time.time() // BUCKET_SECONDS))
+            ranking = self._rankings.get((window, category_id))
+            return ranking.top(limit) if ranking else []
+
+    def units_sold(self, db: Session) -> Dict[int, int]:
+        """All-time units sold per product, for use as a popularity weight"""
+        self._ensure_loaded(db)
+        with self._lock:
+            ranking = self._rankings.get((ALL_TIME, None))
+            return dict(ranking.counts) if ranking else {}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._rankings.clear()
+            self._buckets.clear()
+            self._loaded = False
+            self._loaded_at = float("-inf")
+
+    def _ensure_loaded(self, db: Session) -> None:
+        if self._loaded:
+            if time.monotonic() - self._loaded_at >= self.reload_seconds:
+                self._reloader.trigger()
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            self._load(db)
+            self._loaded = True
+            self._loaded_at = time.monotonic()
+
+    def _record(self, product_id: int, category_id: Optional[int], units: int, at: Optional[float]) -> None:
+        now_bucket = int(time.time() // BUCKET_SECONDS)
+        bucket = int(at // BUCKET_SECONDS) if at is not None else now_bucket
+        self._expire(now_bucket)
+        self._add(ALL_TIME, product_id, category_id, units)
+        if bucket > self._oldest_live_bucket(now_bucket):
+            self._count(bucket, product_id, category_id, units)
+
+    def _load(self, db: Session) -> int:
+        """Aggregate completed orders up to the newest order id, which is returned"""
+        # Both queries stop at the same order, so a sale is counted in both or neither
+        through_order_id = db.scalar(select(func.max(Order.id))) or 0
+        completed = (Order.status == "completed") & (Order.id <= through_order_id)
+
+        totals = (
+            db.query(OrderItem.product_id, Product.category_id, func.sum(OrderItem.quantity))
+            .join(Order, OrderItem.order_id == Order.id)
+            .join(Product, OrderItem.product_id == Product.id)
+            .filter(completed)
+            .group_by(OrderItem.product_id)
+            .all()
+        )
+        for product_id, category_id, units in totals:
+            self._add(ALL_TIME, product_id, category_id, units)
+
+        now_bucket = int(time.time() // BUCKET_SECONDS)
+        since = datetime.utcnow() - timedelta(hours=self.window_buckets)
+        hour = cast(func.strftime("%s", Order.created_at), Integer) / BUCKET_SECONDS
+        recent = (
+            db.query(OrderItem.product_id, Product.category_id, hour, func.sum(OrderItem.quantity))
+            .join(Order, OrderItem.order_id == Order.id)
+            .join(Product, OrderItem.product_id == Product.id)
+            .filter(completed, type_coerce(Order.created_at, String) >= to_db_timestamp(since))
+            .group_by(OrderItem.product_id, hour)
+            .order_by(hour)
+            .all()
+        )
+        for product_id, category_id, bucket, units in recent:
+            if bucket > self._oldest_live_bucket(now_bucket):
+                self._count(bucket, product_id, category_id, units)
+
+        logger.info(f"Leaderboard loaded: {len(totals)} products, {len(self._buckets)} live buckets")
+        return through_order_id
+
+    def _add(self, window: str, product_id: int, category_id: Optional[int], units: int) -> None:
+        self._rankings[(window, None)].add(product_id, units)
+        if category_id is not None:
+            self._rankings[(window, category_id)].add(product_id, units)
+
+    def _count(self, bucket: int, product_id: int, category_id: Optional[int], units: int) -> None:
+        counts = self._bucket(bucket)
+        counts[(product_id, category_id)] = counts.get((product_id, category_id), 0) + units
+        self._add(ROLLING, product_id, category_id, units)
+
+    def _bucket(self, bucket: int) -> Dict[Tuple[int, Optional[int]], int]:
+        if not self._buckets or self._buckets[-1][0] < bucket:
+            self._buckets.append((bucket, {}))
+            return self._buckets[-1][1]
+        for key, counts in reversed(self._buckets):
+            if key == bucket:
+                return counts
+        # Late sale for an hour with no bucket yet; keep the deque ordered
+        position = next(i for i, (key, _) in enumerate(self._buckets) if key > bucket)
+        self._buckets.insert(position, (bucket, {}))
+        return self._buckets[position][1]
+
+    def _oldest_live_bucket(self, now_bucket: int) -> int:
+        return now_bucket - self.window_buckets
+
+    def _expire(self, now_bucket: int) -> None:
+        oldest = self._oldest_live_bucket(now_bucket)
+        while self._buckets and self._buckets[0][0] <= oldest:
+            _, counts = self._buckets.popleft()
+            for (product_id, category_id), units in counts.items():
+                self._add(ROLLING, product_id, category_id, -units)
+
+
+leaderboard = Leaderboard(
+    window_days=settings.LEADERBOARD_WINDOW_DAYS,
+    reload_seconds=settings.LEADERBOARD_RELOAD_SECONDS
+)
@@ -3,10 +3,11 @@ from sqlalchemy.orm import Session
 from datetime import datetime
 import logging
 
-from app.auth.models import User
+from app.auth.principals import Principal
 from app.cart.models import CartItem
 from app.core.database import get_db
 from app.core.dependencies import get_current_user, require_user
+from app.orders.leaderboard import leaderboard
 from app.orders.models import Order, OrderItem
 from app.orders.schemas import OrderResponse, OrderListResponse
 from app.exception import (
@@ -15,6 +16,9 @@ from app.exception import (
     OrderCreationError,
     DatabaseError
 )
+from app.products.cache import catalog_cache
+from app.products.columnar import columnar_catalog
+from app.products.events import product_events
 from app.products.models import Product
 
 # Get logger from the app namespace
@@ -24,7 +28,7 @@ router = APIRouter(prefix="/orders", tags=["orders"])
 @router.post("/checkout", response_model=OrderResponse)
 async def checkout(
         db: Session = Depends(get_db),
-        current_user: User = Depends(require_user)
+        current_user: Principal = Depends(require_user)
 ):
     logger.info(f"Checkout initiated for user: {current_user.email}")
 
@@ -74,6 +78,8 @@ async def checkout(
             # Track products for stock update
             products_to_update[product.id] = {
                 "product": product,
+                "category_id": product.category_id,
+                "price": product.price,
                 "quantity": item.quantity
             }
 
@@ -106,6 +112,7 @@ async def checkout(
                 # Update product stock
                 product_info = products_to_update[item_data["product_id"]]
                 product_info["product"].stock -= product_info["quantity"]
+                product_info["stock"] = product_info["product"].stock
 
             # Clear cart
             db.query(CartItem).filter(CartItem.user_id == current_user.id).delete()
@@ -123,6 +130,26 @@ async def checkout(
             )
             raise DatabaseError("Order processing failed") from e
 
+        # The order is committed from here on. These only refresh in-process
+        # views of it, so a failure is logged rather than answered with an
+        # error the client would retry, placing the order twice.
+        try:
+            catalog_cache.invalidate_products(products_to_update.keys())
+            columnar_catalog.sync(db, products_to_update.keys())
+        except Exception:
+            logger.exception(f"Catalog refresh failed after order {order.id}")
+        for product_id, product_info in products_to_update.items():
+            try:
+                leaderboard.record(
+                    product_id, product_info["category_id"], product_info["quantity"], order_id=order.id
+                )
+            except Exception:
+                logger.exception(f"Leaderboard update failed for product {product_id} of order {order.id}")
+            try:
+                product_events.publish(product_id, product_info["stock"], product_info["price"])
+            except Exception:
+                logger.exception(f"Stock event failed for product {product_id} of order {order.id}")
+
         return order
 
     except Exception as e:
@@ -132,7 +159,7 @@ async def checkout(
 @router.get("", response_model=list[OrderListResponse])
 async def view_order_history(
         db: Session = Depends(get_db),
-        current_user: User = Depends(require_user)
+        current_user: Principal = Depends(require_user)
 ):
     logger.info(f"Order history requested for user: {current_user.email}")
 
@@ -166,7 +193,7 @@ async def view_order_history(
 async def view_order_details(
         order_id: int,
         db: Session = Depends(get_db),
-        current_user: User = Depends(require_user)
+        current_user: Principal = Depends(require_user)
 ):
     logger.info(f"Order details requested for order {order_id} by user {current_user.email}")
 
@@ -0,0 +1,244 @@
+import heapq
+import logging
+import re
+import threading
+import time
+from bisect import bisect_left, insort
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.orders.leaderboard import leaderboard
+from app.products.models import Category, Product
+from app.utils.background import BackgroundRefresh
+
+logger = logging.getLogger("app.products.autocomplete")
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+# Prefixes matching more keys than this get a precomputed top-k list;
+# smaller ranges are cheap enough to rank on every request
+SCAN_LIMIT = 64
+
+_END = "\uffff"
+
+Entry = Tuple[str, int]  # (kind, id), kind is "product" or "category"
+
+
+def normalize(text: Optional[str]) -> str:
+    return " ".join(_TOKEN.findall((text or "").lower()))
+
+
+def suggestion_keys(text: str) -> List[str]:
+    """Every word-start suffix of a suggestion, so "runn" matches "Red Running Shoes" too"""
+    words = normalize(text).split(" ")
+    return [" ".join(words[i:]) for i in range(len(words)) if words[i]]
+
+
+class AutocompleteIndex:
+    """
+    Search-as-you-type suggestions over product and category names.
+
+    Keys are kept in a sorted list searched with bisect, so a prefix is a
+    contiguous range. Every prefix whose range holds more than SCAN_LIMIT keys
+    has its top-k suggestions (by popularity) precomputed, so a request is a
+    dict lookup or a scan of at most SCAN_LIMIT keys. Product writes patch the
+    structure in place; popularity weights are refreshed by a full rebuild
+    every AUTOCOMPLETE_REBUILD_SECONDS, run in a background thread while
+    requests keep answering from the previous structure (or with no
+    suggestions before the first build finishes).
+    """
+
+    def __init__(self, top_k: int, rebuild_seconds: int):
+        self.top_k = top_k
+        self.rebuild_seconds = rebuild_seconds
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._keys: List[Tuple[str, Entry]] = []
+        self._entries: Dict[Entry, Tuple[str, int]] = {}  # entry -> (text, weight)
+        self._top: Dict[str, List[Entry]] = {}
+        self._built = False
+        self._built_at = float("-inf")
+        # Writes made while a rebuild runs, replayed onto the new structure
+        self._pending: Optional[List[Tuple[Callable, tuple]]] = None
+        self._rebuilder = BackgroundRefresh("autocomplete-rebuild", self.rebuild)
+
+    def suggest(self, prefix: str, limit: int) -> List[Tuple[Entry, str]]:
+        """Return up to `limit` ((kind, id), text) suggestions, most popular first"""
+        if time.monotonic() - self._built_at >= self.rebuild_seconds:
+            self._rebuilder.trigger()
+
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        with self._lock:
+            top = self._top.get(prefix)
+            if top is None:
+                top = self._scan(*self._range(prefix))
+            return [(entry, self._entries[entry][0]) for entry in top[:limit]]
+
+    def rebuild(self, db: Session) -> None:
+        # The new structure is built aside and swapped in, so suggest() keeps
+        # answering from the old one meanwhile
+        with self._build_lock:
+            if time.monotonic() - self._built_at < self.rebuild_seconds:
+                return
+            started = time.perf_counter()
+            with self._lock:
+                self._pending = []
+            try:
+                keys, entries = self._load(db)
+            except Exception:
+                with self._lock:
+                    self._pending = None
+                raise
+
+            with self._lock:
+                self._keys, self._entries, self._top = keys, entries, {}
+                self._collect(0, len(keys), 0)
+                for change, args in self._pending:
+                    change(*args)
+                self._pending = None
+                self._built = True
+                self._built_at = time.monotonic()
+
+            logger.info(
+                f"Autocomplete index built: {len(entries)} suggestions, {len(keys)} keys, "
+                f"{len(self._top)} precomputed prefixes in {time.perf_counter() - started:.3f}s"
+            )
+
+    def _load(self, db: Session) -> Tuple[List[Tuple[str, Entry]], Dict[Entry, Tuple[str, int]]]:
+        units = leaderboard.units_sold(db)
+        entries: Dict[Entry, Tuple[str, int]] = {}
+        category_units: Dict[int, int] = {}
+        for product_id, name, category_id in db.execute(select(Product.id, Product.name, Product.category_id)):
+            sold = units.get(product_id, 0)
+            entries[("product", product_id)] = (name, sold)
+            if category_id is not None:
+                category_units[category_id] = category_units.get(category_id, 0) + sold
+        for category_id, name in db.execute(select(Category.id, Category.name)):
+            entries[("category", category_id)] = (name, category_units.get(category_id, 0))
+
+        keys = sorted((key, entry) for entry, (text, _) in entries.items() for key in suggestion_keys(text))
+        return keys, entries
+
+    def upsert_product(self, product) -> None:
+        """Patch in a created or updated product, keeping its current popularity"""
+        self._apply(self._upsert_product, product.id, product.name, product.category_id, product.category)
+
+    def upsert_category(self, category) -> None:
+        self._apply(self._upsert, ("category", category.id), category.name)
+
+    def remove_product(self, product_id: int) -> None:
+        self._apply(self._remove, ("product", product_id))
+
+    def invalidate(self) -> None:
+        """Rebuild on next use, e.g. after an import bypassed the ORM"""
+        self._built_at = float("-inf")
+
+    def _apply(self, change: Callable, *args) -> None:
+        # Changes take plain values, not ORM objects, so a replay after the
+        # request's session closed sees the same data
+        with self._lock:
+            if self._pending is not None:
+                self._pending.append((change, args))
+            if self._built:
+                change(*args)
+
+    def _upsert_product(self, product_id: int, name: str, category_id: Optional[int], category: str) -> None:
+        self._upsert(("product", product_id), name)
+        if category_id is not None and ("category", category_id) not in self._entries:
+            self._add(("category", category_id), category.strip(), 0)
+
+    def _rank(self, entry: Entry) -> Tuple[int, str, Entry]:
+        text, weight = self._entries[entry]
+        return -weight, text, entry
+
+    def _best(self, entries: Iterable[Entry], n: int) -> List[Entry]:
+        return heapq.nsmallest(n, set(entries), key=self._rank)
+
+    def _range(self, prefix: str) -> Tuple[int, int]:
+        return bisect_left(self._keys, (prefix,)), bisect_left(self._keys, (prefix + _END,))
+
+    def _scan(self, lo: int, hi: int, n: Optional[int] = None) -> List[Entry]:
+        return self._best((self._keys[i][1] for i in range(lo, hi)), n or self.top_k)
+
+    def _collect(self, lo: int, hi: int, depth: int) -> List[Entry]:
+        """
+        Top-k for keys[lo:hi], which share their first `depth` characters.
+
+        Splits the range by the next character; heavy children are collected
+        recursively and their lists stored, light ones are scanned. Each key
+        is scanned once, so the whole build is linear in the number of keys.
+        Stored lists keep 2 * top_k entries so that removals rarely need a
+        rescan of the range.
+        """
+        candidates: List[Entry] = []
+        i = lo
+        while i < hi:
+            key = self._keys[i][0]
+            if len(key) <= depth:
+                candidates.append(self._keys[i][1])
+                i += 1
+                continue
+            prefix = key[:depth + 1]
+            j = bisect_left(self._keys, (prefix + _END,), i, hi)
+            if j - i > SCAN_LIMIT:
+                child = self._collect(i, j, depth + 1)
+                self._top[prefix] = child
+            else:
+                child = self._scan(i, j, 2 * self.top_k)
+            candidates.extend(child)
+            i = j
+        return self._best(candidates, 2 * self.top_k)
+
+    def _upsert(self, entry: Entry, text: str) -> None:
+        weight = self._entries.get(entry, ("", 0))[1]
+        self._remove(entry)
+        self._add(entry, text, weight)
+
+    def _add(self, entry: Entry, text: str, weight: int) -> None:
+        self._entries[entry] = (text, weight)
+        for key in suggestion_keys(text):
+            insort(self._keys, (key, entry))
+            # Precomputed prefixes form a chain from the first character down,
+            # since every parent of a heavy prefix is heavy too
+            for length in range(1, len(key) + 1):
+                top = self._top.get(key[:length])
+                if top is None:
+                    break
+                # Keys of one entry share prefixes when words start alike ("sandal sale", "sale")
+                if entry in top:
+                    continue
+                # A list holds the exact best len(top) entries of its range, so
+                # anything ranked below its tail may only join a short list
+                if len(top) < self.top_k or self._rank(entry) < self._rank(top[-1]):
+                    top.append(entry)
+                    top.sort(key=self._rank)
+                    del top[2 * self.top_k:]
+
+    def _remove(self, entry: Entry) -> None:
+        if entry not in self._entries:
+            return
+        keys = suggestion_keys(self._entries[entry][0])
+        for key in keys:
+            position = bisect_left(self._keys, (key, entry))
+            if position < len(self._keys) and self._keys[position] == (key, entry):
+                del self._keys[position]
+        stale = {key[:length] for key in keys for length in range(1, len(key) + 1)}
+        del self._entries[entry]
+        for prefix in stale:
+            top = self._top.get(prefix)
+            if top is not None and entry in top:
+                top[:] = [kept for kept in top if kept != entry]
+                # Only refill from the range once the spare entries are used up
+                if len(top) < self.top_k:
+                    self._top[prefix] = self._scan(*self._range(prefix), 2 * self.top_k)
+
+
+autocomplete_index = AutocompleteIndex(
+    top_k=settings.AUTOCOMPLETE_TOP_K,
+    rebuild_seconds=settings.AUTOCOMPLETE_REBUILD_SECONDS
+)
@@ -0,0 +1,86 @@
+import logging
+from collections import Counter
+from typing import Dict, List
+
+from sqlalchemy import case, select, update
+from sqlalchemy.orm import Session
+
+from app.products.models import Product
+from app.products.schemas import AdjustmentOutcome, BulkAdjustmentResult, ProductAdjustment
+
+logger = logging.getLogger("app.products.bulk")
+
+# Keeps IN lists and CASE expressions well inside SQLite's bound parameter limit
+CHUNK_SIZE = 500
+
+
+def _case(mapping: Dict[int, object], default):
+    return case(mapping, value=Product.id, else_=default) if mapping else default
+
+
+def apply_adjustments(
+        db: Session,
+        operations: List[ProductAdjustment],
+        admin_id: int
+) -> BulkAdjustmentResult:
+    """
+    Apply price/stock changes to many products in one transaction.
+
+    Ownership is checked with a single IN query per chunk, and each chunk is
+    written with one UPDATE ... SET col = CASE id WHEN ... END. Stock deltas are
+    applied relative to the stored value and guarded in the WHERE clause, so
+    concurrent checkouts can never drive stock negative.
+    """
+    outcomes: Dict[int, AdjustmentOutcome] = {}
+    counts = Counter(op.id for op in operations)
+    pending = []
+    for op in operations:
+        if counts[op.id] > 1:
+            outcomes[op.id] = AdjustmentOutcome(id=op.id, status="rejected", detail="Duplicate id in request")
+        else:
+            pending.append(op)
+
+    for start in range(0, len(pending), CHUNK_SIZE):
+        chunk = pending[start:start + CHUNK_SIZE]
+        owned = set(db.scalars(
+            select(Product.id).where(
+                Product.id.in_([op.id for op in chunk]),
+                Product.created_by == admin_id
+            )
+        ))
+
+        chunk = [op for op in chunk if op.id in owned]
+        for op in pending[start:start + CHUNK_SIZE]:
+            if op.id not in owned:
+                outcomes[op.id] = AdjustmentOutcome(id=op.id, status="not_found", detail="Product not found")
+        if not chunk:
+            continue
+
+        prices = {op.id: op.price for op in chunk if op.price is not None}
+        stocks = {op.id: op.stock for op in chunk if op.stock is not None}
+        deltas = {op.id: op.stock_delta for op in chunk if op.stock_delta is not None}
+
+        new_stock = _case(stocks, Product.stock + _case(deltas, 0))
+        values = {"stock": new_stock} if stocks or deltas else {}
+        if prices:
+            values["price"] = _case(prices, Product.price)
+
+        rows = db.execute(
+            update(Product.__table__)
+            .where(Product.id.in_([op.id for op in chunk]), new_stock >= 0)
+            .values(**values)
+            .returning(Product.id, Product.price, Product.stock)
+        ).all()
+
+        for product_id, price, stock in rows:
+            outcomes[product_id] = AdjustmentOutcome(id=product_id, status="updated", price=price, stock=stock)
+        for op in chunk:
+            if op.id not in outcomes:
+                outcomes[op.id] = AdjustmentOutcome(id=op.id, status="rejected", detail="Insufficient stock")
+
+    db.commit()
+
+    results = [outcomes[op_id] for op_id in dict.fromkeys(op.id for op in operations)]
+    updated = sum(1 for outcome in results if outcome.status == "updated")
+    logger.info(f"Bulk adjustment by admin {admin_id}: {updated} updated, {len(results) - updated} failed")
+    return BulkAdjustmentResult(updated=updated, failed=len(results) - updated, results=results)
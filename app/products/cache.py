@@ -0,0 +1,149 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, Optional, Set
+
+from app.core.config import settings
+
+logger = logging.getLogger("app.products.cache")
+
+
+class CatalogCache:
+    """
+    Bounded LRU cache with a per-entry TTL for catalog reads.
+
+    Single products are stored under ("product", id) and listing pages under
+    ("list", ...). A product write drops that product's entry and every cached
+    listing, since any listing may now include, exclude, reorder or show it
+    with different stock. Listings are stored as (catalog version, value)
+    pairs and a version mismatch is a miss, which also catches writes made by
+    other worker processes. Products are stored as (version, value) pairs and
+    served without a version check, so other workers' writes to a cached
+    product show up when the entry expires.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._list_keys: Set[Hashable] = set()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            if key[0] == "list":
+                self._list_keys.add(key)
+
+            while len(self._entries) > self.max_entries:
+                oldest, _ = self._entries.popitem(last=False)
+                self._list_keys.discard(oldest)
+                self.evictions += 1
+
+    def invalidate_products(self, product_ids: Iterable[int]) -> None:
+        """Drop the given products and all cached listings"""
+        with self._lock:
+            for product_id in product_ids:
+                if self._entries.pop(("product", product_id), None) is not None:
+                    self.invalidations += 1
+            self._clear_listings()
+
+    def invalidate_listings(self) -> None:
+        with self._lock:
+            self._clear_listings()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._list_keys.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "listing_entries": len(self._list_keys),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+    def _remove(self, key: Hashable) -> None:
+        self._entries.pop(key, None)
+        self._list_keys.discard(key)
+
+    def _clear_listings(self) -> None:
+        for key in self._list_keys:
+            self._entries.pop(key, None)
+        self.invalidations += len(self._list_keys)
+        self._list_keys.clear()
+
+
+def product_key(product_id: int) -> tuple:
+    return ("product", product_id)
+
+
+def listing_key(filters, sort_by: str, sort_order: str) -> tuple:
+    """Normalize listing parameters so equivalent requests share an entry"""
+    category = filters.category.lower() if filters.category else None
+    return (
+        "list",
+        category or None,
+        filters.category_match,
+        filters.min_price,
+        filters.max_price,
+        sort_by,
+        sort_order,
+        filters.cursor,
+        filters.page_size,
+    )
+
+
+def facets_key(filters, buckets: int) -> tuple:
+    """Facets depend on the same filters as listings and are invalidated with them"""
+    category = filters.category.lower() if filters.category else None
+    return (
+        "list",
+        "facets",
+        category or None,
+        filters.category_match,
+        filters.min_price,
+        filters.max_price,
+        buckets,
+    )
+
+
+catalog_cache = CatalogCache(
+    max_entries=settings.CATALOG_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.CATALOG_CACHE_TTL_SECONDS
+)
@@ -0,0 +1,105 @@
+import logging
+
+from sqlalchemy import func, inspect, select, text
+from sqlalchemy.engine import Engine
+
+from app.products.models import Category, Product
+
+logger = logging.getLogger("app.products.categories")
+
+# Slugs are computed with SQLite's lower(trim()) everywhere, in triggers and in
+# lookups alike, so the same normalization is applied on both sides.
+_ASSIGN_CATEGORY = """
+    INSERT OR IGNORE INTO categories (name, slug, created_at)
+    VALUES (trim(new.category), lower(trim(new.category)), CURRENT_TIMESTAMP);
+    UPDATE products
+    SET category_id = (SELECT id FROM categories WHERE slug = lower(trim(new.category)))
+    WHERE id = new.id;
+"""
+
+_CREATE_TRIGGERS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS products_category_ai AFTER INSERT ON products
+    WHEN trim(coalesce(new.category, '')) != '' BEGIN
+        {_ASSIGN_CATEGORY}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS products_category_au AFTER UPDATE OF category ON products
+    WHEN trim(coalesce(new.category, '')) != '' BEGIN
+        {_ASSIGN_CATEGORY}
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS products_category_cleared AFTER UPDATE OF category ON products
+    WHEN trim(coalesce(new.category, '')) = '' BEGIN
+        UPDATE products SET category_id = NULL WHERE id = new.id;
+    END
+    """,
+]
+
+
+def add_category_column(engine: Engine) -> None:
+    """create_all() does not alter existing tables, so add products.category_id if missing"""
+    columns = {column["name"] for column in inspect(engine).get_columns("products")}
+    if "category_id" in columns:
+        return
+
+    logger.info("Adding products.category_id column")
+    with engine.begin() as conn:
+        conn.execute(text("ALTER TABLE products ADD COLUMN category_id INTEGER REFERENCES categories (id)"))
+
+
+def init_categories(engine: Engine) -> None:
+    """Install the category sync triggers and backfill products that predate them"""
+    if engine.dialect.name != "sqlite":
+        logger.warning("Category sync triggers require SQLite; category_id will not be maintained")
+        return
+
+    with engine.begin() as conn:
+        for trigger in _CREATE_TRIGGERS:
+            conn.execute(text(trigger))
+
+        conn.execute(text("""
+            INSERT OR IGNORE INTO categories (name, slug, created_at)
+            SELECT trim(category), lower(trim(category)), CURRENT_TIMESTAMP FROM products
+            WHERE category_id IS NULL AND trim(coalesce(category, '')) != ''
+        """))
+        backfilled = conn.execute(text("""
+            UPDATE products
+            SET category_id = (SELECT id FROM categories WHERE slug = lower(trim(products.category)))
+            WHERE category_id IS NULL AND trim(coalesce(category, '')) != ''
+        """)).rowcount
+
+    if backfilled:
+        logger.info(f"Linked {backfilled} products to normalized categories")
+
+
+def category_slug(name: str):
+    return func.lower(func.trim(name))
+
+
+def category_tree_ids(name: str):
+    """Select the ids of the named category and all of its descendants"""
+    tree = (
+        select(Category.id)
+        .where(Category.slug == category_slug(name))
+        .cte("category_tree", recursive=True)
+    )
+    tree = tree.union_all(select(Category.id).where(Category.parent_id == tree.c.id))
+    return select(tree.c.id)
+
+
+def category_filter(name: str, match: str):
+    """
+    Build the product filter for a category name.
+
+    exact    - case-insensitive match on the category itself
+    tree     - the category and every subcategory below it
+    substring - legacy LIKE match on the free-text column (cannot use an index)
+    """
+    if match == "substring":
+        return Product.category.ilike(f"%{name}%")
+    if match == "exact":
+        return Product.category_id == select(Category.id).where(Category.slug == category_slug(name)).scalar_subquery()
+    return Product.category_id.in_(category_tree_ids(name))
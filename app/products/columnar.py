@@ -0,0 +1,395 @@
+import logging
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+from sqlalchemy import String, select, type_coerce
+from sqlalchemy.orm import Session
+
+from app.products.models import Category, Product, ProductVersion
+from app.products.pagination import SORT_COLUMNS, decode_cursor, encode_cursor
+from app.products.schemas import ProductFilters
+from app.products.versions import get_catalog_version
+from app.utils.background import BackgroundRefresh
+
+logger = logging.getLogger("app.products.columnar")
+
+# SQLite's lower() only folds ASCII, so slugs are matched the same way here
+_ASCII_LOWER = str.maketrans("ABCDEFGHIJKLMNOPQRSTUVWXYZ", "abcdefghijklmnopqrstuvwxyz")
+
+# Rows examined in the first step of a page scan; doubles while filters reject rows
+SCAN_CHUNK = 256
+
+
+def _slug(name: str) -> str:
+    return name.strip(" ").translate(_ASCII_LOWER)
+
+
+def _columns():
+    return select(
+        Product.id,
+        Product.price,
+        Product.category_id,
+        Product.name,
+        type_coerce(Product.created_at, String).label("created_at"),
+        ProductVersion.listing_version
+    ).outerjoin(ProductVersion, ProductVersion.product_id == Product.id)
+
+
+class _TextRanks:
+    """
+    Sort ranks for a text column: each row stores the position of its value in
+    a sorted list of distinct values, so ordering and seeking are integer ops.
+    Python compares str by code point, which matches SQLite's BINARY collation.
+    """
+
+    def __init__(self, values: Iterable[str]):
+        self.values = sorted(set(values))
+        self._positions = {value: i for i, value in enumerate(self.values)}
+
+    def rank(self, value: str) -> int:
+        return self._positions[value]
+
+    def add(self, value: str, *ranks: np.ndarray) -> int:
+        """Rank `value`, inserting it if new and shifting the stored ranks above it"""
+        if value in self._positions:
+            return self._positions[value]
+        position = bisect_left(self.values, value)
+        self.values.insert(position, value)
+        for array in ranks:
+            array[array >= position] += 1
+        # Values are never removed until the next rebuild, so positions stay dense
+        for i in range(position, len(self.values)):
+            self._positions[self.values[i]] = i
+        return position
+
+    def seek_key(self, value: str) -> float:
+        """Rank to compare a cursor value against; absent values fall between ranks"""
+        if value in self._positions:
+            return self._positions[value]
+        return bisect_left(self.values, value) - 0.5
+
+
+class _SortedView:
+    """Row positions ordered by (key, product id), the order the SQL path pages in"""
+
+    def __init__(self, rows: np.ndarray, keys: np.ndarray, ids: np.ndarray):
+        order = np.lexsort((ids, keys))
+        self.rows, self.keys, self.ids = rows[order], keys[order], ids[order]
+
+    def locate(self, key, product_id: int, side: str = "left") -> int:
+        lo = np.searchsorted(self.keys, key, "left")
+        hi = np.searchsorted(self.keys, key, "right")
+        return int(lo + np.searchsorted(self.ids[lo:hi], product_id, side))
+
+    def insert(self, row: int, key, product_id: int) -> None:
+        at = self.locate(key, product_id)
+        self.rows = np.insert(self.rows, at, row)
+        self.keys = np.insert(self.keys, at, key)
+        self.ids = np.insert(self.ids, at, product_id)
+
+    def remove(self, key, product_id: int) -> None:
+        at = self.locate(key, product_id)
+        if at < self.ids.size and self.ids[at] == product_id:
+            self.rows = np.delete(self.rows, at)
+            self.keys = np.delete(self.keys, at)
+            self.ids = np.delete(self.ids, at)
+
+
+class _Snapshot:
+    """
+    Browse columns of every product as of one catalog version.
+
+    Prices, category ids and name/created_at sort ranks live in NumPy arrays,
+    with one presorted view per sort column. Synced writes patch it in place;
+    `version` is None once it no longer matches any catalog version.
+    """
+
+    def __init__(self, db: Session, version: Optional[int]):
+        started = time.perf_counter()
+        rows = db.execute(_columns()).all()
+
+        size = len(rows)
+        self._name_ranks = _TextRanks(row.name for row in rows)
+        self._created_ranks = _TextRanks(row.created_at or "" for row in rows)
+        self._ids = np.array([row.id for row in rows], dtype=np.int64)
+        self._prices = np.array([row.price for row in rows], dtype=np.float64)
+        self._categories = np.array(
+            [-1 if row.category_id is None else row.category_id for row in rows], dtype=np.int64
+        )
+        self._names = np.array([self._name_ranks.rank(row.name) for row in rows], dtype=np.int64)
+        self._created = np.array([self._created_ranks.rank(row.created_at or "") for row in rows], dtype=np.int64)
+        self._listing_versions = np.array([row.listing_version or 0 for row in rows], dtype=np.int64)
+        self._size = size
+        self._rows = {row.id: i for i, row in enumerate(rows)}
+
+        positions = np.arange(size, dtype=np.int64)
+        self._views = {sort_by: _SortedView(positions, self._keys(sort_by), self._ids) for sort_by in SORT_COLUMNS}
+
+        self._category_slugs: Dict[str, int] = {}
+        self._category_parents: Dict[int, Optional[int]] = {}
+        self._category_children: Dict[int, List[int]] = defaultdict(list)
+        for category_id, slug, parent_id in db.execute(select(Category.id, Category.slug, Category.parent_id)):
+            self._category_slugs[slug] = category_id
+            self._category_parents[category_id] = parent_id
+            if parent_id is not None:
+                self._category_children[parent_id].append(category_id)
+
+        self.version = version
+        logger.info(f"Columnar catalog built: {size} products in {time.perf_counter() - started:.3f}s")
+
+    def listing_version(self, product_id: int) -> Optional[int]:
+        position = self._rows.get(product_id)
+        return None if position is None else int(self._listing_versions[position])
+
+    def page(self, filters: ProductFilters, sort_by: str, sort_order: str) -> Tuple[List[int], list]:
+        """Product ids of the page plus one look-ahead, and their sort values"""
+        page_rows = self._select(filters, sort_by, sort_order)
+        return self._ids[page_rows].tolist(), [self._sort_value(sort_by, row) for row in page_rows]
+
+    def _keys(self, sort_by: str) -> np.ndarray:
+        if sort_by == "price":
+            return self._prices[:self._size]
+        if sort_by == "name":
+            return self._names[:self._size]
+        return self._created[:self._size]
+
+    def upsert(self, row) -> None:
+        position = self._rows.get(row.id)
+        existing = position is not None
+        if not existing:
+            if self._size == self._ids.size:
+                self._grow()
+            position = self._size
+            self._size += 1
+            self._rows[row.id] = position
+            self._ids[position] = row.id
+
+        names, created = self._views["name"], self._views["created_at"]
+        new_keys = {
+            "price": row.price,
+            "name": self._name_ranks.add(row.name, self._names[:self._size], names.keys),
+            "created_at": self._created_ranks.add(row.created_at or "", self._created[:self._size], created.keys),
+        }
+        # Old keys are read after add() so they carry any rank shift it applied
+        for sort_by, key in new_keys.items():
+            view = self._views[sort_by]
+            old = self._keys(sort_by)[position]
+            if existing and old == key:
+                continue
+            if existing:
+                view.remove(old, row.id)
+            view.insert(position, key, row.id)
+
+        self._prices[position] = row.price
+        self._names[position] = new_keys["name"]
+        self._created[position] = new_keys["created_at"]
+        self._categories[position] = -1 if row.category_id is None else row.category_id
+        self._listing_versions[position] = row.listing_version or 0
+        if row.category_id is not None and row.category_id not in self._category_parents:
+            # The category sync trigger created a category this snapshot has not seen
+            self.version = None
+
+    def remove(self, product_id: int) -> None:
+        position = self._rows.pop(product_id, None)
+        if position is None:
+            return
+        # The row itself stays behind as garbage until the next rebuild
+        for sort_by, view in self._views.items():
+            view.remove(self._keys(sort_by)[position], product_id)
+
+    def _grow(self) -> None:
+        for name in ("_ids", "_prices", "_categories", "_names", "_created", "_listing_versions"):
+            column = getattr(self, name)
+            setattr(self, name, np.concatenate([column, np.zeros(max(column.size, 1024), dtype=column.dtype)]))
+
+    def _category_ids(self, name: str, match: str) -> Set[int]:
+        category_id = self._category_slugs.get(_slug(name))
+        if category_id is None:
+            return set()
+        if match == "exact":
+            return {category_id}
+        tree, pending = set(), [category_id]
+        while pending:
+            current = pending.pop()
+            if current not in tree:
+                tree.add(current)
+                pending.extend(self._category_children.get(current, ()))
+        return tree
+
+    def _sort_value(self, sort_by: str, row: int):
+        if sort_by == "price":
+            return float(self._prices[row])
+        if sort_by == "name":
+            return self._name_ranks.values[self._names[row]]
+        return self._created_ranks.values[self._created[row]]
+
+    def _matches(self, rows: np.ndarray, filters: ProductFilters, categories: Optional[np.ndarray]) -> np.ndarray:
+        mask = np.ones(rows.size, dtype=bool)
+        if categories is not None:
+            mask &= np.isin(self._categories[rows], categories)
+        if filters.min_price is not None:
+            mask &= self._prices[rows] >= filters.min_price
+        if filters.max_price is not None:
+            mask &= self._prices[rows] <= filters.max_price
+        return mask
+
+    def _select(self, filters: ProductFilters, sort_by: str, sort_order: str) -> np.ndarray:
+        """Row positions of the page plus one look-ahead row, in page order"""
+        view = self._views[sort_by]
+        descending = sort_order == "desc"
+        start, stop = 0, view.rows.size
+
+        if filters.cursor:
+            value, last_id = decode_cursor(filters.cursor, sort_by, sort_order)
+            if sort_by == "name":
+                value = self._name_ranks.seek_key(value)
+            elif sort_by == "created_at":
+                value = self._created_ranks.seek_key(value)
+            # Rows strictly after (value, last_id) in the requested direction
+            if descending:
+                stop = view.locate(value, last_id, "left")
+            else:
+                start = view.locate(value, last_id, "right")
+
+        categories = None
+        if filters.category:
+            allowed = self._category_ids(filters.category, filters.category_match)
+            categories = np.fromiter(allowed, dtype=np.int64, count=len(allowed))
+
+        wanted = filters.page_size + 1
+        found: List[np.ndarray] = []
+        count, chunk = 0, max(SCAN_CHUNK, wanted)
+        while start < stop and count < wanted:
+            if descending:
+                rows = view.rows[max(start, stop - chunk):stop][::-1]
+                stop -= rows.size
+            else:
+                rows = view.rows[start:start + chunk]
+                start += rows.size
+            rows = rows[self._matches(rows, filters, categories)][:wanted - count]
+            found.append(rows)
+            count += rows.size
+            chunk *= 2
+
+        return np.concatenate(found) if found else np.empty(0, dtype=np.int64)
+
+
+class ColumnarCatalog:
+    """
+    In-memory columnar snapshot of the browse columns of products.
+
+    A page is a binary search to the cursor followed by vectorized filter
+    masks over growing chunks of a presorted view, so its cost does not
+    depend on the catalog size or the page depth, and only the rows of the
+    page are loaded from the database. Pages and cursors are identical to
+    those of pagination.paginate.
+
+    The snapshot is tagged with the catalog version it reflects. Write paths
+    call sync() with the ids they touched; any other change to the catalog
+    (another worker, an import) shows up as a version mismatch. page() then
+    returns None so the caller falls back to SQL, and a rebuild runs in a
+    background thread with its own session; the new snapshot is swapped in
+    when it is complete. Each row also keeps its product's listing version,
+    so sync() can tell whether the catalog moved by more than the synced
+    writes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot: Optional[_Snapshot] = None
+        # Products synced while a build runs, re-synced into the new snapshot
+        self._pending: Optional[List[int]] = None
+        self._builder = BackgroundRefresh("columnar-catalog-build", self.build)
+
+    def page(
+            self,
+            db: Session,
+            version: int,
+            filters: ProductFilters,
+            sort_by: str,
+            sort_order: str
+    ) -> Optional[Tuple[List[Product], Optional[str]]]:
+        """A listing page, or None if the snapshot is not at `version` yet"""
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is not None and snapshot.version == version:
+                ids, values = snapshot.page(filters, sort_by, sort_order)
+            else:
+                # A snapshot ahead of `version` is already current; a rebuild would not help
+                if snapshot is None or snapshot.version is None or snapshot.version < version:
+                    self._builder.trigger()
+                return None
+
+        products = {product.id: product for product in db.query(Product).filter(Product.id.in_(ids))}
+        items = [products[product_id] for product_id in ids[:filters.page_size] if product_id in products]
+
+        next_cursor = None
+        if len(ids) > filters.page_size:
+            last = filters.page_size - 1
+            next_cursor = encode_cursor(sort_by, sort_order, values[last], ids[last])
+        return items, next_cursor
+
+    def sync(self, db: Session, product_ids: Iterable[int]) -> None:
+        """
+        Re-read the given products after a committed write.
+
+        Every catalog bump from a product write comes with a bump of that
+        product's listing counter, so the snapshot adopts the new catalog
+        version only if it moved by exactly the synced products' bumps.
+        Anything else (another worker's write, a category change) leaves it
+        stale until the next rebuild.
+        """
+        product_ids = list(dict.fromkeys(product_ids))
+        with self._lock:
+            if self._pending is not None:
+                self._pending.extend(product_ids)
+            if self._snapshot is not None and self._snapshot.version is not None:
+                self._sync(self._snapshot, db, product_ids)
+
+    def invalidate(self) -> None:
+        """Rebuild on the next query, e.g. after categories were reorganized"""
+        with self._lock:
+            if self._snapshot is not None:
+                self._snapshot.version = None
+
+    def build(self, db: Session) -> None:
+        with self._lock:
+            self._pending = []
+        try:
+            # Read before the rows, so a write in between leaves the snapshot
+            # tagged older than its contents and it is rebuilt, never served stale
+            snapshot = _Snapshot(db, get_catalog_version(db))
+        except Exception:
+            with self._lock:
+                self._pending = None
+            raise
+
+        with self._lock:
+            pending, self._pending = self._pending, None
+            self._snapshot = snapshot
+            if pending and snapshot.version is not None:
+                self._sync(snapshot, db, list(dict.fromkeys(pending)))
+
+    @staticmethod
+    def _sync(snapshot: _Snapshot, db: Session, product_ids: List[int]) -> None:
+        current = {row.id: row for row in db.execute(_columns().where(Product.id.in_(product_ids)))}
+        catalog_version = get_catalog_version(db)
+
+        bumps = 0
+        for product_id in product_ids:
+            known = snapshot.listing_version(product_id)
+            if product_id in current:
+                bumps += (current[product_id].listing_version or 0) - (known or 0)
+                snapshot.upsert(current[product_id])
+            elif known is not None:
+                bumps += 1  # the delete trigger
+                snapshot.remove(product_id)
+        if snapshot.version is not None:
+            snapshot.version = catalog_version if catalog_version == snapshot.version + bumps else None
+
+
+columnar_catalog = ColumnarCatalog()
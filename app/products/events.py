@@ -0,0 +1,104 @@
+import asyncio
+import json
+import logging
+from collections import defaultdict
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Set
+
+from app.core.config import settings
+
+logger = logging.getLogger("app.products.events")
+
+
+def _format(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+class _Subscriber:
+    __slots__ = ("product_ids", "pending", "wakeup")
+
+    def __init__(self, product_ids: Set[int]):
+        self.product_ids = product_ids
+        # Latest unsent change per product; a newer change replaces an older one
+        self.pending: Dict[int, dict] = {}
+        self.wakeup = asyncio.Event()
+
+
+class ProductEventBroker:
+    """
+    Fan-out of product stock/price changes to Server-Sent Events streams.
+
+    Each connection is one coroutine parked on an asyncio.Event, so idle
+    subscribers cost no CPU. Changes are coalesced per connection and
+    product: a client that reads slowly gets the latest state of each product
+    once instead of an ever growing queue, which bounds per-connection memory
+    by the number of products it watches. publish() can be called from any
+    thread; delivery always happens on the event loop.
+    """
+
+    def __init__(self, keepalive_seconds: float):
+        self.keepalive_seconds = keepalive_seconds
+        self._subscribers: Dict[int, Set[_Subscriber]] = defaultdict(set)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.connections = 0
+
+    def subscribe(self, product_ids: Iterable[int]) -> _Subscriber:
+        self._loop = asyncio.get_running_loop()
+        subscriber = _Subscriber(set(product_ids))
+        for product_id in subscriber.product_ids:
+            self._subscribers[product_id].add(subscriber)
+        self.connections += 1
+        return subscriber
+
+    def unsubscribe(self, subscriber: _Subscriber) -> None:
+        for product_id in subscriber.product_ids:
+            watchers = self._subscribers.get(product_id)
+            if watchers is not None:
+                watchers.discard(subscriber)
+                if not watchers:
+                    del self._subscribers[product_id]
+        self.connections -= 1
+
+    def publish(self, product_id: int, stock: int, price: float) -> None:
+        loop = self._loop
+        if loop is None or product_id not in self._subscribers:
+            return
+        change = {"product_id": product_id, "stock": stock, "price": price}
+        try:
+            on_loop = asyncio.get_running_loop() is loop
+        except RuntimeError:
+            on_loop = False
+        if on_loop:
+            self._deliver(product_id, change)
+        else:
+            loop.call_soon_threadsafe(self._deliver, product_id, change)
+
+    def _deliver(self, product_id: int, change: dict) -> None:
+        for subscriber in self._subscribers.get(product_id, ()):
+            subscriber.pending[product_id] = change
+            subscriber.wakeup.set()
+
+    async def stream(self, subscriber: _Subscriber, snapshot: List[dict]) -> AsyncIterator[str]:
+        """
+        Yield the current state of every watched product, then each change.
+        The response only pulls the next event once the previous one was
+        written, so a slow client leaves changes coalescing in `pending`.
+        """
+        try:
+            for state in snapshot:
+                yield _format("snapshot", state)
+            while True:
+                try:
+                    await asyncio.wait_for(subscriber.wakeup.wait(), self.keepalive_seconds)
+                except asyncio.TimeoutError:
+                    # Comment lines keep proxies from closing an idle connection
+                    yield ": keepalive\n\n"
+                    continue
+                subscriber.wakeup.clear()
+                pending, subscriber.pending = subscriber.pending, {}
+                for change in pending.values():
+                    yield _format("update", change)
+        finally:
+            self.unsubscribe(subscriber)
+
+
+product_events = ProductEventBroker(keepalive_seconds=settings.PRODUCT_STREAM_KEEPALIVE_SECONDS)
@@ -0,0 +1,80 @@
+import csv
+import io
+import json
+import logging
+from datetime import datetime
+from typing import Iterator, Optional
+
+from sqlalchemy import String, func, select, type_coerce
+
+from app.core.database import SessionLocal
+from app.products.models import Product
+from app.utils.helpers import to_db_timestamp
+
+logger = logging.getLogger("app.products.export")
+
+EXPORT_COLUMNS = (
+    Product.id,
+    Product.name,
+    Product.description,
+    Product.price,
+    Product.stock,
+    Product.category,
+    Product.image_url,
+    Product.created_at,
+    Product.updated_at,
+)
+EXPORT_FIELDS = [column.key for column in EXPORT_COLUMNS]
+
+
+def _iter_batches(updated_since: Optional[datetime], batch_size: int) -> Iterator[list]:
+    """
+    Stream product rows in fixed-size batches from a server-side cursor.
+
+    The generator owns its session because it outlives the request's
+    dependencies while the response body is being sent.
+    """
+    statement = select(*EXPORT_COLUMNS).order_by(Product.id)
+    if updated_since is not None:
+        # Rows that were never updated only carry created_at
+        last_changed = type_coerce(func.coalesce(Product.updated_at, Product.created_at), String)
+        statement = statement.where(last_changed >= to_db_timestamp(updated_since))
+
+    db = SessionLocal()
+    try:
+        result = db.execute(statement.execution_options(yield_per=batch_size))
+        exported = 0
+        for rows in result.partitions():
+            exported += len(rows)
+            yield rows
+        logger.info(f"Catalog export finished: {exported} products")
+    finally:
+        db.close()
+
+
+def _serialize(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def iter_ndjson(updated_since: Optional[datetime], batch_size: int) -> Iterator[str]:
+    for rows in _iter_batches(updated_since, batch_size):
+        yield "".join(
+            json.dumps({field: _serialize(value) for field, value in zip(EXPORT_FIELDS, row)}) + "\n"
+            for row in rows
+        )
+
+
+def iter_csv(updated_since: Optional[datetime], batch_size: int) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_FIELDS)
+
+    for rows in _iter_batches(updated_since, batch_size):
+        writer.writerows([_serialize(value) for value in row] for row in rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+
+    # Header only, when nothing matched
+    if buffer.tell():
+        yield buffer.getvalue()
@@ -0,0 +1,103 @@
+import codecs
+import csv
+import json
+import logging
+from typing import BinaryIO, Iterator, List, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.products.models import Product
+from app.products.schemas import ImportRowError, ProductCreate, ProductImportResult
+
+logger = logging.getLogger("app.products.import")
+
+IMPORT_BATCH_SIZE = 5000
+MAX_REPORTED_ERRORS = 1000
+
+# Optional CSV columns that arrive as empty strings when left blank
+_NULLABLE_FIELDS = ("description", "category", "image_url")
+
+
+def _iter_csv(stream: BinaryIO) -> Iterator[Tuple[int, dict]]:
+    reader = csv.DictReader(codecs.getreader("utf-8-sig")(stream))
+    for row_number, record in enumerate(reader, start=1):
+        for field in _NULLABLE_FIELDS:
+            if record.get(field) == "":
+                record[field] = None
+        yield row_number, record
+
+
+def _iter_ndjson(stream: BinaryIO) -> Iterator[Tuple[int, object]]:
+    for row_number, line in enumerate(codecs.getreader("utf-8-sig")(stream), start=1):
+        if not line.strip():
+            continue
+        try:
+            yield row_number, json.loads(line)
+        except json.JSONDecodeError as e:
+            yield row_number, ValueError(f"Invalid JSON: {e.msg}")
+
+
+def _format_errors(error: Exception) -> List[str]:
+    if isinstance(error, ValidationError):
+        return [
+            f"{'.'.join(str(part) for part in detail['loc']) or 'row'}: {detail['msg']}"
+            for detail in error.errors()
+        ]
+    return [str(error)]
+
+
+def import_products(db: Session, stream: BinaryIO, fmt: str, created_by: int) -> ProductImportResult:
+    """
+    Validate each record against ProductCreate and insert valid rows with
+    executemany in batches of IMPORT_BATCH_SIZE, one transaction per batch.
+    Invalid rows are reported and skipped without aborting the import.
+    """
+    records = _iter_csv(stream) if fmt == "csv" else _iter_ndjson(stream)
+    result = ProductImportResult(inserted=0, failed=0, errors=[])
+    batch: List[dict] = []
+    batch_rows: List[int] = []
+
+    def report(row_number: int, messages: List[str]) -> None:
+        result.failed += 1
+        if len(result.errors) < MAX_REPORTED_ERRORS:
+            result.errors.append(ImportRowError(row=row_number, errors=messages))
+        else:
+            result.errors_truncated = True
+
+    def flush() -> None:
+        try:
+            db.execute(insert(Product.__table__), batch)
+            db.commit()
+            result.inserted += len(batch)
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Import batch of {len(batch)} rows failed: {str(e)}", exc_info=True)
+            for row_number in batch_rows:
+                report(row_number, ["Database error while inserting batch"])
+        batch.clear()
+        batch_rows.clear()
+
+    for row_number, record in records:
+        if isinstance(record, Exception):
+            report(row_number, _format_errors(record))
+            continue
+        try:
+            product = ProductCreate.model_validate(record)
+        except ValidationError as e:
+            report(row_number, _format_errors(e))
+            continue
+
+        row = product.model_dump()
+        row["created_by"] = created_by
+        batch.append(row)
+        batch_rows.append(row_number)
+        if len(batch) >= IMPORT_BATCH_SIZE:
+            flush()
+
+    if batch:
+        flush()
+
+    logger.info(f"Import finished: {result.inserted} inserted, {result.failed} failed")
+    return result
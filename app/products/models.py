@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, Text, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, Text, DateTime, ForeignKey, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 
@@ -6,6 +6,12 @@ from app.core.database import Base
 
 class Product(Base):
     __tablename__ = "products"
+    __table_args__ = (
+        # Keyset pagination seeks on (sort column, id)
+        Index("ix_products_name_id", "name", "id"),
+        Index("ix_products_price_id", "price", "id"),
+        Index("ix_products_created_at_id", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, index=True, nullable=False)
@@ -13,6 +19,7 @@ class Product(Base):
     price = Column(Float, nullable=False)
     stock = Column(Integer, nullable=False)
     category = Column(String, index=True)
+    category_id = Column(Integer, ForeignKey("categories.id"), index=True)  # Kept in sync with category by triggers
     image_url = Column(String)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
@@ -21,4 +28,28 @@ class Product(Base):
     # Relationships
     cart_items = relationship("CartItem", back_populates="product", cascade="all, delete-orphan")
     order_items = relationship("OrderItem", back_populates="product", cascade="all, delete-orphan")
-    creator = relationship("User", back_populates="products")  # New relationship
\ No newline at end of file
+    creator = relationship("User", back_populates="products")  # New relationship
+    category_ref = relationship("Category", back_populates="products")
+
+class Category(Base):
+    __tablename__ = "categories"
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, nullable=False)
+    slug = Column(String, unique=True, index=True, nullable=False)  # lower(trim(name)) for case-insensitive lookups
+    parent_id = Column(Integer, ForeignKey("categories.id"), index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    parent = relationship("Category", remote_side=[id], back_populates="children")
+    children = relationship("Category", back_populates="parent")
+    products = relationship("Product", back_populates="category_ref")
+
+
+class ProductVersion(Base):
+    """Change counters maintained by triggers; product_id 0 versions the whole catalog"""
+    __tablename__ = "product_versions"
+
+    product_id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=1)
+    # Bumped with the catalog counter, i.e. not by stock-only writes
+    listing_version = Column(Integer, nullable=False, server_default="1")
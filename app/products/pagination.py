@@ -0,0 +1,102 @@
+import base64
+import binascii
+import json
+from typing import Any, List, Optional, Tuple
+
+from sqlalchemy import String, asc, desc, tuple_, type_coerce
+from sqlalchemy.orm import Query
+
+from app.exception import InvalidInputError
+from app.products.models import Product
+
+# Columns products can be sorted on. created_at is compared as the stored text so
+# cursor values round-trip exactly against SQLite's CURRENT_TIMESTAMP format.
+SORT_COLUMNS = {
+    "name": Product.name,
+    "price": Product.price,
+    "created_at": type_coerce(Product.created_at, String),
+}
+
+DEFAULT_SORT_BY = "created_at"
+DEFAULT_SORT_ORDER = "desc"
+
+
+def resolve_sort(sort_by: Optional[str], sort_order: Optional[str]) -> Tuple[str, str]:
+    """Validate sort parameters and fall back to newest-first"""
+    if not sort_by:
+        return DEFAULT_SORT_BY, DEFAULT_SORT_ORDER
+
+    if sort_by not in SORT_COLUMNS:
+        raise InvalidInputError(
+            detail=f"Invalid sort field. Valid options: {', '.join(SORT_COLUMNS.keys())}"
+        )
+
+    sort_order = (sort_order or "asc").lower()
+    if sort_order not in ("asc", "desc"):
+        raise InvalidInputError(detail="sort_order must be 'asc' or 'desc'")
+
+    return sort_by, sort_order
+
+
+def encode_cursor(sort_by: str, sort_order: str, value: Any, product_id: int) -> str:
+    """Encode the position after the last returned row as an opaque token"""
+    payload = json.dumps(
+        {"s": sort_by, "o": sort_order, "v": value, "i": product_id},
+        separators=(",", ":")
+    )
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_by: str, sort_order: str) -> Tuple[Any, int]:
+    """Decode a cursor and check it was issued for the same sort"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        value, product_id = data["v"], int(data["i"])
+        issued_for = (data["s"], data["o"])
+    except (binascii.Error, UnicodeError, ValueError, KeyError, TypeError):
+        raise InvalidInputError(detail="Invalid cursor")
+
+    if issued_for != (sort_by, sort_order):
+        raise InvalidInputError(detail="Cursor does not match the requested sort order")
+
+    return value, product_id
+
+
+def paginate(
+        query: Query,
+        sort_by: str,
+        sort_order: str,
+        cursor: Optional[str],
+        page_size: int
+) -> Tuple[List[Product], Optional[str]]:
+    """
+    Return one page of `query` using a keyset (seek) predicate instead of OFFSET,
+    so every page costs the same index range scan regardless of depth.
+    Rows are ordered by the sort column with the product id as tie-breaker.
+    """
+    sort_column = SORT_COLUMNS[sort_by]
+    direction = desc if sort_order == "desc" else asc
+
+    if cursor:
+        value, last_id = decode_cursor(cursor, sort_by, sort_order)
+        position = tuple_(sort_column, Product.id)
+        if sort_order == "desc":
+            query = query.filter(position < tuple_(value, last_id))
+        else:
+            query = query.filter(position > tuple_(value, last_id))
+
+    rows = (
+        query.add_columns(sort_column.label("cursor_value"))
+        .order_by(direction(sort_column), direction(Product.id))
+        .limit(page_size + 1)
+        .all()
+    )
+
+    products = [row[0] for row in rows[:page_size]]
+    next_cursor = None
+    if len(rows) > page_size:
+        last_product, last_value = rows[page_size - 1]
+        next_cursor = encode_cursor(sort_by, sort_order, last_value, last_product.id)
+
+    return products, next_cursor
@@ -1,26 +1,81 @@
 import logging
-from fastapi import APIRouter, Depends, HTTPException, Query
+from datetime import datetime
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Request, Response, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Integer, case, cast, func, literal, select
 from sqlalchemy.orm import Session
 from typing import Optional
-from sqlalchemy import asc, desc
+from app.core.config import settings
 from app.core.database import get_db
 from app.core.dependencies import  require_admin, require_user
-from app.auth.models import UserRole, User
-from app.products.models import Product
-from app.products.schemas import ProductCreate, ProductUpdate, ProductInDB
-from app.exception import ProductNotFoundError, DatabaseError, InvalidInputError
+from app.auth.models import UserRole
+from app.auth.principals import Principal
+from app.orders.cooccurrence import cooccurrence_index
+from app.orders.leaderboard import ALL_TIME, ROLLING, leaderboard
+from app.products.autocomplete import autocomplete_index
+from app.products.bulk import apply_adjustments
+from app.products.cache import catalog_cache, facets_key, listing_key, product_key
+from app.products.export import iter_csv, iter_ndjson
+from app.products.importer import import_products
+from app.products.categories import category_filter, category_slug
+from app.products.columnar import columnar_catalog
+from app.products.events import product_events
+from app.products.models import Category, Product
+from app.products.pagination import paginate, resolve_sort
+from app.products.search import full_text_search
+from app.products.similarity import similarity_index
+from app.products.versions import (
+    catalog_etag,
+    get_catalog_version,
+    get_product_version,
+    product_etag,
+    query_products_with_versions
+)
+from app.products.schemas import (
+    BestsellerEntry,
+    BulkAdjustmentRequest,
+    BulkAdjustmentResult,
+    CategoryCreate,
+    CategoryInDB,
+    CategoryUpdate,
+    CategoryFacet,
+    PriceBucket,
+    ProductCreate,
+    ProductFacets,
+    ProductFilters,
+    ProductImportResult,
+    ProductBatch,
+    ProductInDB,
+    ProductPage,
+    ProductUpdate,
+    RelatedProduct,
+    Suggestion
+)
+from app.exception import CategoryNotFoundError, ProductNotFoundError, DatabaseError, InvalidInputError
+from app.utils.helpers import etag_matches
 
 # Create logger for this module
 logger = logging.getLogger("app.products")
 
 router = APIRouter(prefix="/products", tags=["products"])
 
+CATEGORY_MATCH_MODES = ("tree", "exact", "substring")
+
+# Keeps one batch within a single IN query well under SQLite's bound parameter limit
+MAX_BATCH_IDS = 300
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
 # Admin-only endpoints
 @router.post("/admin", response_model=ProductInDB)
 async def create_product(
         product: ProductCreate,
         db: Session = Depends(get_db),
-        current_user: User = Depends(require_admin)  # Requires last logged-in admin
+        current_user: Principal = Depends(require_admin)  # Requires last logged-in admin
 ):
     try:
         logger.info(f"Admin {current_user.id} creating product: {product.name}")
@@ -33,6 +88,10 @@ async def create_product(
         db.add(db_product)
         db.commit()
         db.refresh(db_product)
+        catalog_cache.invalidate_listings()
+        columnar_catalog.sync(db, [db_product.id])
+        similarity_index.upsert(db_product)
+        autocomplete_index.upsert_product(db_product)
 
         logger.info(f"Product created: ID={db_product.id}, Name={db_product.name}")
         return db_product
@@ -41,30 +100,234 @@ async def create_product(
         logger.error(f"Failed to create product: {str(e)}", exc_info=True)
         raise DatabaseError(detail="Failed to create product")
 
-@router.get("/admin", response_model=list[ProductInDB])
+@router.post("/admin/import", response_model=ProductImportResult)
+async def import_products_file(
+        file: UploadFile = File(..., description="CSV with a header row, or NDJSON"),
+        format: Optional[str] = Query(None, description="File format (csv or ndjson); inferred from the file name when omitted"),
+        db: Session = Depends(get_db),
+        current_user: Principal = Depends(require_admin)
+):
+    fmt = (format or (file.filename or "").rsplit(".", 1)[-1]).lower()
+    if fmt == "jsonl":
+        fmt = "ndjson"
+    if fmt not in EXPORT_MEDIA_TYPES:
+        logger.warning(f"Invalid import format: {format} (file {file.filename})")
+        raise InvalidInputError(detail="format must be 'csv' or 'ndjson'")
+
+    try:
+        logger.info(f"Admin {current_user.id} importing products from {file.filename} as {fmt}")
+
+        # Parsing and validation are CPU bound, keep them off the event loop
+        result = await run_in_threadpool(import_products, db, file.file, fmt, current_user.id)
+        if result.inserted:
+            catalog_cache.invalidate_listings()
+            columnar_catalog.invalidate()
+            similarity_index.invalidate()
+            autocomplete_index.invalidate()
+
+        logger.info(f"Admin {current_user.id} imported {result.inserted} products, {result.failed} rejected")
+        return result
+
+    except UnicodeDecodeError:
+        logger.warning(f"Import file is not valid UTF-8: {file.filename}")
+        raise InvalidInputError(detail="Import file must be UTF-8 encoded")
+    except Exception as e:
+        logger.error(f"Failed to import products: {str(e)}", exc_info=True)
+        raise DatabaseError(detail="Failed to import products")
+
+@router.post("/admin/bulk-adjust", response_model=BulkAdjustmentResult)
+async def bulk_adjust_products(
+        request: BulkAdjustmentRequest,
+        db: Session = Depends(get_db),
+        current_user: Principal = Depends(require_admin)
+):
+    try:
+        logger.info(f"Admin {current_user.id} adjusting {len(request.operations)} products in bulk")
+
+        result = apply_adjustments(db, request.operations, current_user.id)
+        updated = [outcome.id for outcome in result.results if outcome.status == "updated"]
+        catalog_cache.invalidate_products(updated)
+        columnar_catalog.sync(db, updated)
+        for outcome in result.results:
+            if outcome.status == "updated":
+                _publish_stock(outcome.id, outcome.stock, outcome.price)
+        return result
+
+    except Exception as e:
+        logger.error(f"Bulk adjustment failed: {str(e)}", exc_info=True)
+        db.rollback()
+        raise DatabaseError(detail="Failed to adjust products")
+
+@router.post("/admin/categories", response_model=CategoryInDB)
+async def create_category(
+        category: CategoryCreate,
+        db: Session = Depends(get_db),
+        current_user: Principal = Depends(require_admin)
+):
+    try:
+        logger.info(f"Admin {current_user.id} creating category: {category.name}")
+
+        if category.parent_id is not None and not db.get(Category, category.parent_id):
+            logger.warning(f"Parent category not found: ID={category.parent_id}")
+            raise CategoryNotFoundError()
+
+        existing = db.query(Category.id).filter(Category.slug == category_slug(category.name)).first()
+        if existing:
+            logger.warning(f"Category already exists: {category.name}")
+            raise InvalidInputError(detail="Category already exists")
+
+        db_category = Category(
+            name=category.name.strip(),
+            slug=category_slug(category.name),
+            parent_id=category.parent_id
+        )
+        db.add(db_category)
+        db.commit()
+        db.refresh(db_category)
+        autocomplete_index.upsert_category(db_category)
+
+        logger.info(f"Category created: ID={db_category.id}, Name={db_category.name}")
+        return db_category
+
+    except (CategoryNotFoundError, InvalidInputError):
+        raise
+    except Exception as e:
+        logger.error(f"Failed to create category: {str(e)}", exc_info=True)
+        db.rollback()
+        raise DatabaseError(detail="Failed to create category")
+
+@router.put("/admin/categories/{category_id}", response_model=CategoryInDB)
+async def update_category(
+        category_id: int,
+        category: CategoryUpdate,
+        db: Session = Depends(get_db),
+        current_user: Principal = Depends(require_admin)
+):
+    try:
+        logger.info(f"Admin {current_user.id} updating category ID={category_id}")
+
+        db_category = db.get(Category, category_id)
+        if not db_category:
+            logger.warning(f"Category not found for update: ID={category_id}")
+            raise CategoryNotFoundError()
+
+        update_data = category.model_dump(exclude_unset=True)
+        if update_data.get("parent_id") is not None:
+            # Walk up from the new parent; reaching this category would create a cycle
+            ancestor = db.get(Category, update_data["parent_id"])
+            if not ancestor:
+                logger.warning(f"Parent category not found: ID={update_data['parent_id']}")
+                raise CategoryNotFoundError()
+            while ancestor is not None:
+                if ancestor.id == category_id:
+                    logger.warning(f"Category cycle rejected: {category_id} under {update_data['parent_id']}")
+                    raise InvalidInputError(detail="A category cannot be nested under itself")
+                ancestor = ancestor.parent
+
+        if "parent_id" in update_data:
+            db_category.parent_id = update_data["parent_id"]
+        renamed = []
+        if update_data.get("name"):
+            taken = db.query(Category.id).filter(
+                Category.slug == category_slug(update_data["name"]),
+                Category.id != category_id
+            ).first()
+            if taken:
+                logger.warning(f"Category name already in use: {update_data['name']}")
+                raise InvalidInputError(detail="Category already exists")
+
+            db_category.name = update_data["name"].strip()
+            db_category.slug = category_slug(update_data["name"])
+            db.flush()
+            renamed = [product_id for (product_id,) in db.query(Product.id).filter(Product.category_id == category_id)]
+            # Keep the denormalized product column in step; the sync trigger finds the renamed slug
+            db.query(Product).filter(Product.category_id == category_id).update(
+                {Product.category: db_category.name}, synchronize_session=False
+            )
+
+        db.commit()
+        db.refresh(db_category)
+        catalog_cache.invalidate_products(renamed)
+        columnar_catalog.invalidate()
+        autocomplete_index.upsert_category(db_category)
+        if renamed:
+            # The category name is part of each product's similarity terms
+            for product in db.execute(
+                select(Product.id, Product.name, Product.category, Product.description)
+                .where(Product.category_id == category_id)
+            ):
+                similarity_index.upsert(product)
+
+        logger.info(f"Category updated successfully: ID={category_id}")
+        return db_category
+
+    except (CategoryNotFoundError, InvalidInputError):
+        raise
+    except Exception as e:
+        logger.error(f"Failed to update category: {str(e)}", exc_info=True)
+        db.rollback()
+        raise DatabaseError(detail="Failed to update category")
+
+@router.get("/admin", response_model=ProductPage)
 async def read_admin_products(
         db: Session = Depends(get_db),
-        current_user: User = Depends(require_admin)  # Requires last logged-in admin
+        current_user: Principal = Depends(require_admin),  # Requires last logged-in admin
+        sort_by: Optional[str] = Query(None, description="Sort by field (name, price, created_at)"),
+        sort_order: Optional[str] = Query("asc", description="Sort order (asc or desc)"),
+        cursor: Optional[str] = Query(None, description="Opaque cursor from a previous page's next_cursor"),
+        page_size: int = Query(20, ge=1, le=100, description="Number of products per page"),
 ):
     try:
         logger.info(f"Admin {current_user.id} listing their products")
 
-        products = db.query(Product).filter(
+        query = db.query(Product).filter(
             Product.created_by == current_user.id
-        ).all()
+        )
+        sort_field, order = resolve_sort(sort_by, sort_order)
+        products, next_cursor = paginate(query, sort_field, order, cursor, page_size)
 
         logger.info(f"Found {len(products)} products for admin {current_user.id}")
-        return products
+        return ProductPage(items=products, next_cursor=next_cursor)
 
+    except InvalidInputError:
+        raise
     except Exception as e:
         logger.error(f"Failed to list admin products: {str(e)}", exc_info=True)
         raise DatabaseError(detail="Failed to retrieve products")
 
+@router.get("/admin/cache-stats")
+async def read_cache_stats(
+        current_user: Principal = Depends(require_admin)
+):
+    logger.info(f"Admin {current_user.id} reading catalog cache stats")
+    return catalog_cache.stats()
+
+@router.get("/admin/export")
+async def export_products(
+        format: str = Query("ndjson", description="Feed format (ndjson or csv)"),
+        updated_since: Optional[datetime] = Query(None, description="Only products created or updated at or after this time"),
+        batch_size: int = Query(1000, ge=100, le=10000, description="Rows fetched per database round trip"),
+        current_user: Principal = Depends(require_admin)
+):
+    fmt = format.lower()
+    if fmt not in EXPORT_MEDIA_TYPES:
+        logger.warning(f"Invalid export format: {format}")
+        raise InvalidInputError(detail="format must be 'ndjson' or 'csv'")
+
+    logger.info(f"Admin {current_user.id} exporting catalog as {fmt} (updated_since={updated_since})")
+
+    body = iter_csv(updated_since, batch_size) if fmt == "csv" else iter_ndjson(updated_since, batch_size)
+    return StreamingResponse(
+        body,
+        media_type=EXPORT_MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="catalog.{fmt}"'}
+    )
+
 @router.get("/admin/{product_id}", response_model=ProductInDB)
 async def read_admin_product(
         product_id: int,
         db: Session = Depends(get_db),
-        current_user: User = Depends(require_admin)  # Requires last logged-in admin
+        current_user: Principal = Depends(require_admin)  # Requires last logged-in admin
 ):
     try:
         logger.info(f"Admin {current_user.id} accessing product ID={product_id}")
@@ -92,7 +355,7 @@ async def update_product(
         product_id: int,
         product: ProductUpdate,
         db: Session = Depends(get_db),
-        current_user: User = Depends(require_admin)  # Requires last logged-in admin
+        current_user: Principal = Depends(require_admin)  # Requires last logged-in admin
 ):
     try:
         logger.info(f"Admin {current_user.id} updating product ID={product_id}")
@@ -106,6 +369,8 @@ async def update_product(
             logger.warning(f"Product not found for update: ID={product_id}")
             raise ProductNotFoundError()
 
+        previous = (db_product.stock, db_product.price)
+
         # Log changes
         changes = []
         update_data = product.model_dump(exclude_unset=True)
@@ -118,6 +383,12 @@ async def update_product(
 
         db.commit()
         db.refresh(db_product)
+        catalog_cache.invalidate_products([product_id])
+        columnar_catalog.sync(db, [product_id])
+        similarity_index.upsert(db_product)
+        autocomplete_index.upsert_product(db_product)
+        if (db_product.stock, db_product.price) != previous:
+            _publish_stock(product_id, db_product.stock, db_product.price)
 
         logger.info(f"Product updated successfully: ID={db_product.id}")
         return db_product
@@ -133,7 +404,7 @@ async def update_product(
 async def delete_product(
         product_id: int,
         db: Session = Depends(get_db),
-        current_user: User = Depends(require_admin)  # Requires last logged-in admin
+        current_user: Principal = Depends(require_admin)  # Requires last logged-in admin
 ):
     try:
         logger.info(f"Admin {current_user.id} deleting product ID={product_id}")
@@ -150,6 +421,10 @@ async def delete_product(
         logger.info(f"Deleting product: ID={product.id}, Name={product.name}")
         db.delete(product)
         db.commit()
+        catalog_cache.invalidate_products([product_id])
+        columnar_catalog.sync(db, [product_id])
+        similarity_index.remove(product_id)
+        autocomplete_index.remove_product(product_id)
 
         logger.info(f"Product deleted successfully: ID={product_id}")
         return None
@@ -161,85 +436,309 @@ async def delete_product(
         db.rollback()
         raise DatabaseError(detail="Failed to delete product")
 
+def _publish_stock(product_id: int, stock: int, price: float) -> None:
+    # Runs after the write committed; a failed notification must not fail the request
+    try:
+        product_events.publish(product_id, stock, price)
+    except Exception:
+        logger.exception(f"Stock event failed for product {product_id}")
+
+def hydrate_related(db: Session, ranked: list) -> list[RelatedProduct]:
+    """Load ranked (product_id, score) pairs with one IN query, keeping their order"""
+    products = {
+        product.id: product
+        for product in db.query(Product).filter(Product.id.in_([product_id for product_id, _ in ranked]))
+    }
+    return [
+        RelatedProduct(product=products[product_id], score=score)
+        for product_id, score in ranked
+        if product_id in products
+    ]
+
+def validate_product_filters(filters: ProductFilters) -> None:
+    if filters.category and filters.category_match not in CATEGORY_MATCH_MODES:
+        logger.warning(f"Invalid category_match: {filters.category_match}")
+        raise InvalidInputError(detail=f"category_match must be one of: {', '.join(CATEGORY_MATCH_MODES)}")
+
+    if filters.min_price is not None and filters.min_price < 0:
+        logger.warning(f"Invalid min_price: {filters.min_price}")
+        raise InvalidInputError(detail="min_price cannot be negative")
+
+    if filters.max_price is not None:
+        if filters.max_price < 0:
+            logger.warning(f"Invalid max_price: {filters.max_price}")
+            raise InvalidInputError(detail="max_price cannot be negative")
+        if filters.min_price is not None and filters.max_price < filters.min_price:
+            logger.warning(f"Invalid price range: min={filters.min_price}, max={filters.max_price}")
+            raise InvalidInputError(detail="max_price must be greater than min_price")
+
+def parse_product_ids(ids: list[str], limit: int) -> list[int]:
+    """Accept ids comma separated, repeated, or both"""
+    try:
+        product_ids = [int(part) for value in ids for part in value.split(",") if part.strip()]
+    except ValueError:
+        logger.warning(f"Invalid product ids: {ids}")
+        raise InvalidInputError(detail="ids must be integers")
+    if not product_ids:
+        raise InvalidInputError(detail="At least one product id is required")
+    if len(product_ids) > limit:
+        logger.warning(f"Request for {len(product_ids)} products rejected")
+        raise InvalidInputError(detail=f"At most {limit} ids can be requested at once")
+    return product_ids
+
+def apply_product_filters(query, filters: ProductFilters):
+    """Apply the category and price range filters shared by the browse endpoints"""
+    validate_product_filters(filters)
+
+    if filters.category:
+        query = query.filter(category_filter(filters.category, filters.category_match))
+    if filters.min_price is not None:
+        query = query.filter(Product.price >= filters.min_price)
+    if filters.max_price is not None:
+        query = query.filter(Product.price <= filters.max_price)
+
+    return query
+
+def use_columnar_catalog(filters: ProductFilters, version: Optional[int]) -> bool:
+    """The columnar index needs catalog versions to stay fresh and cannot do substring matches"""
+    return (
+        settings.COLUMNAR_CATALOG_ENABLED
+        and version is not None
+        and not (filters.category and filters.category_match == "substring")
+    )
+
 # User-only endpoints
-@router.get("", response_model=list[ProductInDB])
+@router.get("", response_model=ProductPage)
 async def read_products(
+        request: Request,
+        response: Response,
         db: Session = Depends(get_db),
-        current_user: User = Depends(require_user),
+        current_user: Principal = Depends(require_user),
         category: Optional[str] = Query(None, description="Filter by product category"),
+        category_match: str = Query("tree", description="tree (category and subcategories), exact, or substring"),
         min_price: Optional[float] = Query(None, description="Minimum price filter"),
         max_price: Optional[float] = Query(None, description="Maximum price filter"),
         sort_by: Optional[str] = Query(None, description="Sort by field (name, price, created_at)"),
         sort_order: Optional[str] = Query("asc", description="Sort order (asc or desc)"),
+        cursor: Optional[str] = Query(None, description="Opaque cursor from a previous page's next_cursor"),
+        page_size: int = Query(20, ge=1, le=100, description="Number of products per page"),
 ):
     try:
+        filters = ProductFilters(
+            category=category,
+            category_match=category_match,
+            min_price=min_price,
+            max_price=max_price,
+            sort_by=sort_by,
+            sort_order=sort_order,
+            cursor=cursor,
+            page_size=page_size
+        )
         logger.info(f"User {current_user.id} browsing products. Filters: "
                     f"category={category}, min_price={min_price}, max_price={max_price}, "
-                    f"sort_by={sort_by}, sort_order={sort_order}")
+                    f"sort_by={sort_by}, sort_order={sort_order}, page_size={page_size}")
+
+        sort_field, order = resolve_sort(filters.sort_by, filters.sort_order)
+
+        version = get_catalog_version(db)
+        if version is not None:
+            etag = catalog_etag(version)
+            response.headers["ETag"] = etag
+            if etag_matches(request.headers.get("if-none-match"), etag):
+                logger.info(f"Product listing not modified for user {current_user.id}")
+                return Response(status_code=304, headers={"ETag": etag})
+
+        cache_key = listing_key(filters, sort_field, order)
+        cached = catalog_cache.get(cache_key)
+        if cached is not None and cached[0] == version:
+            logger.info(f"Returning cached product page to user {current_user.id}")
+            return cached[1]
+
+        result = None
+        if use_columnar_catalog(filters, version):
+            validate_product_filters(filters)
+            # None while the snapshot is behind; it catches up in the background
+            result = columnar_catalog.page(db, version, filters, sort_field, order)
+        if result is not None:
+            products, next_cursor = result
+        else:
+            query = apply_product_filters(db.query(Product), filters)
+            products, next_cursor = paginate(query, sort_field, order, filters.cursor, filters.page_size)
+
+        page = ProductPage(items=products, next_cursor=next_cursor)
+        catalog_cache.set(cache_key, (version, page))
+        logger.info(f"Returning {len(products)} products to user {current_user.id}")
+        return page
+
+    except (InvalidInputError, ProductNotFoundError):
+        raise
+    except Exception as e:
+        logger.error(f"Failed to retrieve products: {str(e)}", exc_info=True)
+        raise DatabaseError(detail="Failed to retrieve products")
+
+
+@router.get("/categories", response_model=list[CategoryInDB])
+async def read_categories(
+        db: Session = Depends(get_db),
+        current_user: Principal = Depends(require_user)
+):
+    logger.info(f"User {current_user.id} listing categories")
+    return db.query(Category).order_by(Category.name).all()
 
-        query = db.query(Product)
+@router.get("/bestsellers", response_model=list[BestsellerEntry])
+async def read_bestsellers(
+        db: Session = Depends(get_db),
+        current_user: Principal = Depends(require_user),
+        window: str = Query("all", description="all (all-time) or window (rolling window, 7 days by default)"),
+        category: Optional[str] = Query(None, description="Only rank products in this category"),
+        limit: int = Query(10, ge=1, le=100, description="Number of products to return"),
+):
+    try:
+        logger.info(f"User {current_user.id} reading bestsellers: window={window}, category={category}")
 
-        # Apply category filter
+        if window not in (ALL_TIME, ROLLING):
+            logger.warning(f"Invalid bestseller window: {window}")
+            raise InvalidInputError(detail=f"window must be '{ALL_TIME}' or '{ROLLING}'")
+
+        category_id = None
         if category:
-            query = query.filter(Product.category.ilike(f"%{category}%"))
-
-        # Apply price range filter
-        if min_price is not None:
-            if min_price < 0:
-                logger.warning(f"Invalid min_price: {min_price}")
-                raise InvalidInputError(detail="min_price cannot be negative")
-            query = query.filter(Product.price >= min_price)
-
-        if max_price is not None:
-            if max_price < 0:
-                logger.warning(f"Invalid max_price: {max_price}")
-                raise InvalidInputError(detail="max_price cannot be negative")
-            if min_price is not None and max_price < min_price:
-                logger.warning(f"Invalid price range: min={min_price}, max={max_price}")
-                raise InvalidInputError(detail="max_price must be greater than min_price")
-            query = query.filter(Product.price <= max_price)
-
-        # Apply sorting
-        sort_mapping = {
-            "name": Product.name,
-            "price": Product.price,
-            "created_at": Product.created_at
+            category_id = db.scalar(select(Category.id).where(Category.slug == category_slug(category)))
+            if category_id is None:
+                raise CategoryNotFoundError()
+
+        ranking = leaderboard.top(db, limit, window=window, category_id=category_id)
+        products = {
+            product.id: product
+            for product in db.query(Product).filter(Product.id.in_([product_id for product_id, _ in ranking]))
         }
 
-        if sort_by:
-            if sort_by not in sort_mapping:
-                logger.warning(f"Invalid sort_by parameter: {sort_by}")
-                raise InvalidInputError(detail=f"Invalid sort field. Valid options: {', '.join(sort_mapping.keys())}")
+        return [
+            BestsellerEntry(product=products[product_id], units_sold=units)
+            for product_id, units in ranking
+            if product_id in products
+        ]
 
-            sort_field = sort_mapping[sort_by]
-            if sort_order.lower() not in ("asc", "desc"):
-                logger.warning(f"Invalid sort_order: {sort_order}")
-                raise InvalidInputError(detail="sort_order must be 'asc' or 'desc'")
+    except (InvalidInputError, CategoryNotFoundError):
+        raise
+    except Exception as e:
+        logger.error(f"Failed to read bestsellers: {str(e)}", exc_info=True)
+        raise DatabaseError(detail="Failed to retrieve bestsellers")
 
-            if sort_order.lower() == "desc":
-                query = query.order_by(desc(sort_field))
+@router.get("/facets", response_model=ProductFacets)
+async def read_product_facets(
+        request: Request,
+        response: Response,
+        db: Session = Depends(get_db),
+        current_user: Principal = Depends(require_user),
+        category: Optional[str] = Query(None, description="Filter by product category"),
+        category_match: str = Query("tree", description="tree (category and subcategories), exact, or substring"),
+        min_price: Optional[float] = Query(None, description="Minimum price filter"),
+        max_price: Optional[float] = Query(None, description="Maximum price filter"),
+        buckets: int = Query(10, ge=1, le=50, description="Number of price histogram buckets"),
+):
+    try:
+        filters = ProductFilters(
+            category=category,
+            category_match=category_match,
+            min_price=min_price,
+            max_price=max_price
+        )
+        logger.info(f"User {current_user.id} requesting facets. Filters: "
+                    f"category={category}, min_price={min_price}, max_price={max_price}, buckets={buckets}")
+
+        version = get_catalog_version(db)
+        if version is not None:
+            etag = catalog_etag(version)
+            response.headers["ETag"] = etag
+            if etag_matches(request.headers.get("if-none-match"), etag):
+                return Response(status_code=304, headers={"ETag": etag})
+
+        cache_key = facets_key(filters, buckets)
+        cached = catalog_cache.get(cache_key)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        category_rows = (
+            apply_product_filters(
+                db.query(Category.name, func.count(Product.id))
+                .select_from(Product)
+                .outerjoin(Category, Product.category_id == Category.id),
+                filters
+            )
+            .group_by(Product.category_id)
+            .order_by(func.count(Product.id).desc(), Category.name)
+            .all()
+        )
+
+        total, lowest, highest = apply_product_filters(
+            db.query(func.count(Product.id), func.min(Product.price), func.max(Product.price)),
+            filters
+        ).one()
+
+        histogram = []
+        if total:
+            # A single price collapses the histogram to one bucket
+            bucket_count = buckets if highest > lowest else 1
+            width = (highest - lowest) / bucket_count
+            if width:
+                # The maximum price would land one past the last bucket, so clamp it in
+                bucket = case(
+                    (Product.price >= highest, bucket_count - 1),
+                    else_=cast((Product.price - lowest) / width, Integer)
+                )
             else:
-                query = query.order_by(asc(sort_field))
-        else:
-            # Default sorting by creation date
-            query = query.order_by(desc(Product.created_at))
+                bucket = literal(0)
+
+            counts = dict(
+                apply_product_filters(db.query(bucket.label("bucket"), func.count(Product.id)), filters)
+                .group_by("bucket")
+                .all()
+            )
+            histogram = [
+                PriceBucket(
+                    min_price=round(lowest + index * width, 2),
+                    max_price=round(highest if index == bucket_count - 1 else lowest + (index + 1) * width, 2),
+                    count=counts.get(index, 0)
+                )
+                for index in range(bucket_count)
+            ]
+
+        facets = ProductFacets(
+            total=total,
+            categories=[CategoryFacet(category=name, count=count) for name, count in category_rows],
+            price_histogram=histogram
+        )
+        catalog_cache.set(cache_key, (version, facets))
+        logger.info(f"Returning facets over {total} products to user {current_user.id}")
+        return facets
 
-        products = query.all()
-        logger.info(f"Returning {len(products)} products to user {current_user.id}")
-        return products
-
-    except (InvalidInputError, ProductNotFoundError):
+    except InvalidInputError:
         raise
     except Exception as e:
-        logger.error(f"Failed to retrieve products: {str(e)}", exc_info=True)
-        raise DatabaseError(detail="Failed to retrieve products")
+        logger.error(f"Failed to compute facets: {str(e)}", exc_info=True)
+        raise DatabaseError(detail="Failed to compute facets")
+
+@router.get("/autocomplete", response_model=list[Suggestion])
+async def autocomplete(
+        q: str = Query(..., min_length=1, max_length=100, description="What the user has typed so far"),
+        limit: int = Query(settings.AUTOCOMPLETE_TOP_K, ge=1, le=settings.AUTOCOMPLETE_TOP_K, description="Number of suggestions"),
+        current_user: Principal = Depends(require_user)
+):
+    try:
+        suggestions = autocomplete_index.suggest(q, limit)
+        return [Suggestion(text=text, kind=kind, id=entry_id) for (kind, entry_id), text in suggestions]
 
+    except Exception as e:
+        logger.error(f"Autocomplete failed for '{q}': {str(e)}", exc_info=True)
+        raise DatabaseError(detail="Autocomplete failed")
 
 @router.get("/search", response_model=list[ProductInDB])
 async def search_products(
         keyword: str = Query(..., min_length=1),
+        page: int = Query(1, ge=1, description="Page number of ranked results"),
+        page_size: int = Query(20, ge=1, le=100, description="Number of results per page"),
         db: Session = Depends(get_db),
-        current_user: User = Depends(require_user)  # Requires last logged-in user
+        current_user: Principal = Depends(require_user)  # Requires last logged-in user
 ):
     try:
         logger.info(f"User {current_user.id} searching for: '{keyword}'")
@@ -248,11 +747,7 @@ async def search_products(
             logger.warning(f"Search keyword too short: '{keyword}'")
             raise InvalidInputError(detail="Search keyword must be at least 2 characters")
 
-        results = db.query(Product).filter(
-            (Product.name.ilike(f"%{keyword}%")) |
-            (Product.description.ilike(f"%{keyword}%")) |
-            (Product.category.ilike(f"%{keyword}%"))
-        ).all()
+        results = full_text_search(db, keyword, limit=page_size, offset=(page - 1) * page_size)
 
         logger.info(f"Found {len(results)} products matching '{keyword}'")
         return results
@@ -263,22 +758,152 @@ async def search_products(
         logger.error(f"Search failed for '{keyword}': {str(e)}", exc_info=True)
         raise DatabaseError(detail="Search operation failed")
 
+@router.get("/batch", response_model=ProductBatch)
+async def read_products_batch(
+        ids: list[str] = Query(..., description="Product ids, comma separated (ids=1,2,3) or repeated (ids=1&ids=2)"),
+        db: Session = Depends(get_db),
+        current_user: Principal = Depends(require_user)
+):
+    product_ids = parse_product_ids(ids, MAX_BATCH_IDS)
+    try:
+        logger.info(f"User {current_user.id} reading {len(product_ids)} products in batch")
+
+        requested = list(dict.fromkeys(product_ids))
+        found = {}
+
+        # Cache hits need no query at all, as in read_product
+        for product_id in requested:
+            cached = catalog_cache.get(product_key(product_id))
+            if cached is not None:
+                found[product_id] = cached[1]
+
+        misses = [product_id for product_id in requested if product_id not in found]
+        if misses:
+            for product, version in query_products_with_versions(db).filter(Product.id.in_(misses)):
+                result = ProductInDB.model_validate(product)
+                catalog_cache.set(product_key(product.id), (version, result))
+                found[product.id] = result
+
+        batch = ProductBatch(
+            items=[found[product_id] for product_id in requested if product_id in found],
+            missing_ids=[product_id for product_id in requested if product_id not in found]
+        )
+        logger.info(f"Returning {len(batch.items)} products, {len(batch.missing_ids)} missing")
+        return batch
+
+    except Exception as e:
+        logger.error(f"Failed to retrieve product batch: {str(e)}", exc_info=True)
+        raise DatabaseError(detail="Failed to retrieve products")
+
+@router.get("/stream")
+async def stream_product_changes(
+        ids: list[str] = Query(..., description="Product ids to watch, comma separated or repeated"),
+        db: Session = Depends(get_db),
+        current_user: Principal = Depends(require_user)
+):
+    product_ids = parse_product_ids(ids, settings.PRODUCT_STREAM_MAX_IDS)
+    try:
+        # Read the snapshot before streaming; the session is released once the response starts
+        snapshot = [
+            {"product_id": product_id, "stock": stock, "price": price}
+            for product_id, stock, price in db.execute(
+                select(Product.id, Product.stock, Product.price).where(Product.id.in_(product_ids))
+            )
+        ]
+    except Exception as e:
+        logger.error(f"Failed to open product stream: {str(e)}", exc_info=True)
+        raise DatabaseError(detail="Failed to open product stream")
+
+    subscriber = product_events.subscribe(product_ids)
+    logger.info(
+        f"User {current_user.id} streaming changes for {len(subscriber.product_ids)} products "
+        f"({product_events.connections} open streams)"
+    )
+    return StreamingResponse(
+        product_events.stream(subscriber, snapshot),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/{product_id}/bought-together", response_model=list[RelatedProduct])
+async def read_bought_together(
+        product_id: int,
+        limit: int = Query(10, ge=1, le=50, description="Number of products to return"),
+        db: Session = Depends(get_db),
+        current_user: Principal = Depends(require_user)
+):
+    try:
+        logger.info(f"User {current_user.id} reading bought-together for product ID={product_id}")
+
+        neighbours = cooccurrence_index.neighbours(product_id, limit)
+        return hydrate_related(db, neighbours)
+
+    except Exception as e:
+        logger.error(f"Failed to read bought-together for product ID={product_id}: {str(e)}", exc_info=True)
+        raise DatabaseError(detail="Failed to retrieve recommendations")
+
+@router.get("/{product_id}/similar", response_model=list[RelatedProduct])
+async def read_similar_products(
+        product_id: int,
+        limit: int = Query(10, ge=1, le=50, description="Number of products to return"),
+        db: Session = Depends(get_db),
+        current_user: Principal = Depends(require_user)
+):
+    try:
+        logger.info(f"User {current_user.id} reading similar products for product ID={product_id}")
+
+        similar = similarity_index.similar(product_id, limit)
+        return hydrate_related(db, similar)
+
+    except Exception as e:
+        logger.error(f"Failed to read similar products for product ID={product_id}: {str(e)}", exc_info=True)
+        raise DatabaseError(detail="Failed to retrieve recommendations")
+
 @router.get("/{product_id}", response_model=ProductInDB)
 async def read_product(
         product_id: int,
+        request: Request,
+        response: Response,
         db: Session = Depends(get_db),
-        current_user: User = Depends(require_user)  # Requires last logged-in user
+        current_user: Principal = Depends(require_user)  # Requires last logged-in user
 ):
     try:
         logger.info(f"User {current_user.id} viewing product ID={product_id}")
 
-        product = db.query(Product).filter(Product.id == product_id).first()
-        if not product:
+        # A cache hit is served with the version stored beside it and no query:
+        # this worker's writes drop the entry, other workers' show up once it expires.
+        # On a miss the version row alone answers conditional requests.
+        if_none_match = request.headers.get("if-none-match")
+        cached = catalog_cache.get(product_key(product_id))
+        if cached is not None:
+            version = cached[0]
+        elif if_none_match:
+            version = get_product_version(db, product_id)
+        else:
+            version = None
+        if version is not None:
+            etag = product_etag(product_id, version)
+            response.headers["ETag"] = etag
+            if etag_matches(if_none_match, etag):
+                logger.info(f"Product not modified: ID={product_id}")
+                return Response(status_code=304, headers={"ETag": etag})
+
+        if cached is not None:
+            logger.info(f"Returning cached product: ID={product_id}")
+            return cached[1]
+
+        row = query_products_with_versions(db).filter(Product.id == product_id).first()
+        if not row:
             logger.warning(f"Product not found: ID={product_id}")
             raise ProductNotFoundError()
 
+        product, version = row
+        if version is not None:
+            response.headers["ETag"] = product_etag(product_id, version)
+        result = ProductInDB.model_validate(product)
+        catalog_cache.set(product_key(product_id), (version, result))
         logger.info(f"Returning product: ID={product_id}, Name={product.name}")
-        return product
+        return result
 
     except ProductNotFoundError:
         raise
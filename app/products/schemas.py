@@ -1,5 +1,5 @@
-from pydantic import BaseModel, Field
-from typing import Optional
+from pydantic import BaseModel, Field, model_validator
+from typing import List, Optional
 from datetime import datetime
 
 class ProductBase(BaseModel):
@@ -22,14 +22,107 @@ class ProductUpdate(BaseModel):
     image_url: Optional[str] = None
 
 class ProductInDB(ProductBase):
+    id: int
     created_at: datetime
     class Config:
         from_attributes = True
 
+class ProductBatch(BaseModel):
+    items: List[ProductInDB]
+    missing_ids: List[int]
+
 class ProductFilters(BaseModel):
     category: Optional[str] = None
+    category_match: str = "tree"
     min_price: Optional[float] = None
     max_price: Optional[float] = None
     sort_by: Optional[str] = None
-    page: int = 1
-    page_size: int = 10
\ No newline at end of file
+    sort_order: Optional[str] = "asc"
+    cursor: Optional[str] = None
+    page_size: int = Field(20, ge=1, le=100)
+
+class CategoryCreate(BaseModel):
+    name: str = Field(..., min_length=1)
+    parent_id: Optional[int] = None
+
+class CategoryUpdate(BaseModel):
+    name: Optional[str] = Field(None, min_length=1)
+    parent_id: Optional[int] = None
+
+class CategoryInDB(BaseModel):
+    id: int
+    name: str
+    parent_id: Optional[int] = None
+
+    class Config:
+        from_attributes = True
+
+class ProductPage(BaseModel):
+    items: List[ProductInDB]
+    next_cursor: Optional[str] = None
+
+class CategoryFacet(BaseModel):
+    category: Optional[str] = None
+    count: int
+
+class PriceBucket(BaseModel):
+    min_price: float
+    max_price: float
+    count: int
+
+class ProductFacets(BaseModel):
+    total: int
+    categories: List[CategoryFacet]
+    price_histogram: List[PriceBucket]
+
+class ImportRowError(BaseModel):
+    row: int
+    errors: List[str]
+
+class ProductImportResult(BaseModel):
+    inserted: int
+    failed: int
+    errors: List[ImportRowError]
+    errors_truncated: bool = False
+
+class ProductAdjustment(BaseModel):
+    id: int
+    price: Optional[float] = Field(None, gt=0)
+    stock: Optional[int] = Field(None, ge=0)
+    stock_delta: Optional[int] = None
+
+    @model_validator(mode="after")
+    def check_fields(self):
+        if self.stock is not None and self.stock_delta is not None:
+            raise ValueError("Provide either stock or stock_delta, not both")
+        if self.price is None and self.stock is None and self.stock_delta is None:
+            raise ValueError("Provide at least one of price, stock or stock_delta")
+        return self
+
+class BulkAdjustmentRequest(BaseModel):
+    operations: List[ProductAdjustment] = Field(..., min_length=1, max_length=5000)
+
+class AdjustmentOutcome(BaseModel):
+    id: int
+    status: str
+    detail: Optional[str] = None
+    price: Optional[float] = None
+    stock: Optional[int] = None
+
+class BulkAdjustmentResult(BaseModel):
+    updated: int
+    failed: int
+    results: List[AdjustmentOutcome]
+
+class BestsellerEntry(BaseModel):
+    product: ProductInDB
+    units_sold: int
+
+class RelatedProduct(BaseModel):
+    product: ProductInDB
+    score: float
+
+class Suggestion(BaseModel):
+    text: str
+    kind: str  # "product" or "category"
+    id: int
\ No newline at end of file
@@ -0,0 +1,120 @@
+import logging
+import re
+from typing import List
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.products.models import Product
+
+logger = logging.getLogger("app.products.search")
+
+FTS_TABLE = "products_fts"
+
+# Column weights for bm25(): name matches rank above category, then description
+BM25_WEIGHTS = (10.0, 1.0, 4.0)
+
+_CREATE_FTS_TABLE = f"""
+CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+    name, description, category,
+    content='products', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2',
+    prefix='2 3'
+)
+"""
+
+# External-content triggers keep the index in step with every write to products,
+# whether it comes from the ORM or from bulk Core statements.
+_CREATE_TRIGGERS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON products BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, name, description, category)
+        VALUES (new.id, new.name, new.description, new.category);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON products BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, description, category)
+        VALUES ('delete', old.id, old.name, old.description, old.category);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF name, description, category ON products BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, description, category)
+        VALUES ('delete', old.id, old.name, old.description, old.category);
+        INSERT INTO {FTS_TABLE}(rowid, name, description, category)
+        VALUES (new.id, new.name, new.description, new.category);
+    END
+    """,
+]
+
+_search_enabled = False
+
+
+def init_search_index(engine: Engine) -> None:
+    """Create the FTS5 index and its sync triggers, building it on first run"""
+    global _search_enabled
+
+    if engine.dialect.name != "sqlite":
+        logger.warning("Full-text index requires SQLite FTS5; falling back to LIKE search")
+        return
+
+    with engine.begin() as conn:
+        exists = conn.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {"name": FTS_TABLE}
+        ).first()
+
+        conn.execute(text(_CREATE_FTS_TABLE))
+        for trigger in _CREATE_TRIGGERS:
+            conn.execute(text(trigger))
+
+        if not exists:
+            logger.info("Building full-text index from existing products")
+            conn.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+
+    _search_enabled = True
+    logger.info("Full-text search index ready")
+
+
+def build_match_query(keyword: str) -> str:
+    """Turn free text into an FTS5 query where every term is a quoted prefix match"""
+    terms = re.findall(r"\w+", keyword.lower())
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+def full_text_search(db: Session, keyword: str, limit: int, offset: int = 0) -> List[Product]:
+    """Return products matching `keyword`, best BM25 score first"""
+    if not _search_enabled:
+        return (
+            db.query(Product)
+            .filter(
+                (Product.name.ilike(f"%{keyword}%")) |
+                (Product.description.ilike(f"%{keyword}%")) |
+                (Product.category.ilike(f"%{keyword}%"))
+            )
+            .order_by(Product.id)
+            .limit(limit)
+            .offset(offset)
+            .all()
+        )
+
+    match = build_match_query(keyword)
+    if not match:
+        return []
+
+    weights = ", ".join(str(weight) for weight in BM25_WEIGHTS)
+    statement = text(f"""
+        SELECT products.* FROM {FTS_TABLE}
+        JOIN products ON products.id = {FTS_TABLE}.rowid
+        WHERE {FTS_TABLE} MATCH :match
+        ORDER BY bm25({FTS_TABLE}, {weights})
+        LIMIT :limit OFFSET :offset
+    """)
+    return (
+        db.query(Product)
+        .from_statement(statement)
+        .params(match=match, limit=limit, offset=offset)
+        .all()
+    )
@@ -0,0 +1,274 @@
+import logging
+import math
+import re
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.products.models import Product
+from app.utils.background import BackgroundRefresh
+
+logger = logging.getLogger("app.products.similarity")
+
+_TOKEN = re.compile(r"[a-z0-9]{2,}")
+
+# Name terms say the most about what a product is, descriptions the least
+FIELD_WEIGHTS = (("name", 2.0), ("category", 1.5), ("description", 1.0))
+
+# Products written since the last build live in a small overlay weighted with
+# that build's IDF; once this share of the catalog has been written the index
+# is rebuilt, which also brings the IDF weights up to date
+REBUILD_WRITE_SHARE = 0.05
+REBUILD_MIN_WRITES = 500
+
+BUILD_BATCH_SIZE = 5000
+
+Vector = Dict[str, float]  # term -> L2-normalized TF-IDF weight
+
+
+def product_terms(product) -> Dict[str, float]:
+    """Field-weighted term counts of a product"""
+    terms: Dict[str, float] = defaultdict(float)
+    for field, weight in FIELD_WEIGHTS:
+        for token in _TOKEN.findall((getattr(product, field) or "").lower()):
+            terms[token] += weight
+    return terms
+
+
+def _normalized(weights: Dict[str, float]) -> Vector:
+    norm = math.sqrt(sum(weight * weight for weight in weights.values()))
+    return {term: weight / norm for term, weight in weights.items()} if norm else {}
+
+
+class _Snapshot:
+    """
+    The catalog's TF-IDF matrix as of one build, never modified afterwards.
+
+    Rows are stored twice: by product (CSR) to read a product's own vector,
+    and by term (CSC, i.e. an inverted index) so that scoring a query only
+    touches the postings of the terms it contains.
+    """
+
+    def __init__(self, ids: np.ndarray, terms: List[str], idf: np.ndarray,
+                 rows: np.ndarray, term_ids: np.ndarray, weights: np.ndarray):
+        self.ids = ids
+        self.size = ids.size
+        self.rows = dict(zip(ids.tolist(), range(ids.size)))
+        self.terms = terms
+        self.vocabulary = {term: i for i, term in enumerate(terms)}
+        self.idf = idf
+
+        # Entries arrive grouped by row, so the CSR view needs no sort
+        self.row_ptr = np.r_[0, np.cumsum(np.bincount(rows, minlength=ids.size))]
+        self.row_terms, self.row_weights = term_ids.astype(np.int32), weights
+        order = np.argsort(term_ids, kind="stable")
+        self.term_ptr = np.r_[0, np.cumsum(np.bincount(term_ids, minlength=len(terms)))]
+        self.term_rows, self.term_weights = rows[order].astype(np.int32), weights[order]
+
+    def vector(self, row: int) -> Vector:
+        start, end = self.row_ptr[row], self.row_ptr[row + 1]
+        return {
+            self.terms[term]: float(weight)
+            for term, weight in zip(self.row_terms[start:end].tolist(), self.row_weights[start:end])
+        }
+
+    def weigh(self, counts: Dict[str, float]) -> Vector:
+        """TF-IDF vector of a product written after the build; new terms get the IDF of an unseen term"""
+        unseen = math.log(1 + self.size) + 1
+        return _normalized({
+            term: (1 + math.log(count)) * (float(self.idf[self.vocabulary[term]]) if term in self.vocabulary else unseen)
+            for term, count in counts.items()
+        })
+
+    def scores(self, vector: Vector) -> np.ndarray:
+        """Cosine similarity of every row to `vector`, summed over the postings of its terms"""
+        known = [(self.vocabulary[term], weight) for term, weight in vector.items() if term in self.vocabulary]
+        if not known:
+            return np.zeros(self.size, dtype=np.float32)
+        # Postings of a term are contiguous, so slicing beats gathering by offset
+        spans = [(self.term_ptr[term], self.term_ptr[term + 1]) for term, _ in known]
+        lengths = [end - start for start, end in spans]
+        query = np.repeat(np.array([weight for _, weight in known], dtype=np.float32), lengths)
+        return np.bincount(
+            np.concatenate([self.term_rows[start:end] for start, end in spans]),
+            weights=np.concatenate([self.term_weights[start:end] for start, end in spans]) * query,
+            minlength=self.size
+        )
+
+
+class SimilarityIndex:
+    """
+    Content-based "similar products" over TF-IDF vectors.
+
+    Each product is an L2-normalized TF-IDF vector over the terms of its name,
+    category and description, with one IDF per term, so a query is the cosine
+    similarity summed over the inverted postings of the product's own terms
+    plus an argpartition for the top k.
+
+    The matrix is built in a background thread with its own session; until
+    the first build finishes queries return nothing, and later rebuilds keep
+    serving the previous build. Product writes go to a small overlay (and
+    hide the product's old row), so they show up at once without touching
+    the built matrix.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._builder = BackgroundRefresh("similarity-build", self.build)
+        self._clear()
+
+    def similar(self, product_id: int, limit: int) -> List[Tuple[int, float]]:
+        """Return up to `limit` (product_id, cosine_similarity) pairs, most similar first"""
+        if self._stale:
+            self._builder.trigger()
+
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is None:
+                return []
+            vector = self._overlay.get(product_id)
+            row = snapshot.rows.get(product_id)
+            if vector is None:
+                if row is None or row in self._hidden:
+                    return []
+                vector = snapshot.vector(row)
+            ranked = self._overlay_scores(vector, product_id)
+            hidden = np.fromiter(self._hidden, dtype=np.int64, count=len(self._hidden))
+
+        # The snapshot is immutable, so its postings are scored without the lock
+        scores = snapshot.scores(vector)
+        scores[hidden] = 0.0
+        if row is not None:
+            scores[row] = 0.0
+        k = min(limit, snapshot.size)
+        if k > 0:
+            top = np.argpartition(scores, -k)[-k:]
+            ranked.extend((int(snapshot.ids[i]), float(scores[i])) for i in top if scores[i] > 0)
+        ranked.sort(key=lambda pair: (-pair[1], pair[0]))
+        return ranked[:limit]
+
+    def upsert(self, product) -> None:
+        """Write a created or updated product into the overlay"""
+        self._apply(product.id, product_terms(product))
+
+    def remove(self, product_id: int) -> None:
+        self._apply(product_id, None)
+
+    def invalidate(self) -> None:
+        """Rebuild from the database in the background, e.g. after a bulk import bypassed the ORM"""
+        with self._lock:
+            self._stale = True
+
+    def reset(self) -> None:
+        with self._lock:
+            self._clear()
+
+    def build(self, db: Session) -> None:
+        with self._lock:
+            if not self._stale:
+                return
+            # Cleared first, so an invalidation during the build asks for another one
+            self._stale = False
+            self._pending = []
+        try:
+            snapshot = self._load(db)
+        except Exception:
+            with self._lock:
+                self._pending = None
+                self._stale = True
+            raise
+
+        with self._lock:
+            pending, self._pending = self._pending, None
+            self._snapshot = snapshot
+            self._reset_overlay()
+            for product_id, counts in pending:
+                self._write(product_id, counts)
+
+    def _clear(self) -> None:
+        self._snapshot: Optional[_Snapshot] = None
+        self._stale = True
+        # Writes made while a build runs, replayed onto the new snapshot
+        self._pending: Optional[List[Tuple[int, Optional[Dict[str, float]]]]] = None
+        self._reset_overlay()
+
+    def _reset_overlay(self) -> None:
+        self._overlay: Dict[int, Vector] = {}
+        self._overlay_postings: Dict[str, Dict[int, float]] = defaultdict(dict)
+        self._hidden: Set[int] = set()  # snapshot rows superseded by a write
+        self._writes = 0
+
+    def _apply(self, product_id: int, counts: Optional[Dict[str, float]]) -> None:
+        with self._lock:
+            if self._pending is not None:
+                self._pending.append((product_id, counts))
+            if self._snapshot is not None:
+                self._write(product_id, counts)
+
+    def _write(self, product_id: int, counts: Optional[Dict[str, float]]) -> None:
+        for term in self._overlay.pop(product_id, ()):
+            del self._overlay_postings[term][product_id]
+        row = self._snapshot.rows.get(product_id)
+        if row is not None:
+            self._hidden.add(row)
+        if counts is not None:
+            vector = self._snapshot.weigh(counts)
+            self._overlay[product_id] = vector
+            for term, weight in vector.items():
+                self._overlay_postings[term][product_id] = weight
+
+        self._writes += 1
+        if self._writes > max(REBUILD_MIN_WRITES, REBUILD_WRITE_SHARE * self._snapshot.size):
+            self._stale = True
+
+    def _overlay_scores(self, vector: Vector, product_id: int) -> List[Tuple[int, float]]:
+        scores: Dict[int, float] = defaultdict(float)
+        for term, weight in vector.items():
+            for other, other_weight in self._overlay_postings.get(term, {}).items():
+                scores[other] += weight * other_weight
+        scores.pop(product_id, None)
+        return [(other, score) for other, score in scores.items() if score > 0]
+
+    def _load(self, db: Session) -> _Snapshot:
+        started = time.perf_counter()
+        products = db.execute(
+            select(Product.id, Product.name, Product.category, Product.description)
+            .execution_options(yield_per=BUILD_BATCH_SIZE)
+        )
+        vocabulary: Dict[str, int] = {}
+        ids, rows, term_ids, counts = [], [], [], []
+        for row, product in enumerate(products):
+            terms = product_terms(product)
+            ids.append(product.id)
+            rows.extend([row] * len(terms))
+            term_ids.extend(vocabulary.setdefault(term, len(vocabulary)) for term in terms)
+            counts.extend(terms.values())
+
+        ids = np.array(ids, dtype=np.int64)
+        rows = np.array(rows, dtype=np.int64)
+        term_ids = np.array(term_ids, dtype=np.int64)
+
+        # Terms are distinct within a product, so each entry is one document
+        document_frequency = np.bincount(term_ids, minlength=len(vocabulary))
+        idf = np.log((1 + ids.size) / (1 + document_frequency)) + 1
+        weights = (1 + np.log(np.array(counts))) * idf[term_ids]
+        norms = np.sqrt(np.bincount(rows, weights=weights * weights, minlength=ids.size))
+        weights = (weights / norms[rows]).astype(np.float32)
+
+        terms = [None] * len(vocabulary)
+        for term, i in vocabulary.items():
+            terms[i] = term
+        snapshot = _Snapshot(ids, terms, idf, rows, term_ids, weights)
+        logger.info(
+            f"Similarity index built: {snapshot.size} products, {len(terms)} terms, "
+            f"{weights.size} postings in {time.perf_counter() - started:.3f}s"
+        )
+        return snapshot
+
+
+similarity_index = SimilarityIndex()
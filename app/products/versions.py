@@ -0,0 +1,142 @@
+import logging
+from typing import Optional
+
+from sqlalchemy import inspect, select, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Query, Session
+
+from app.products.models import Product, ProductVersion
+
+logger = logging.getLogger("app.products.versions")
+
+CATALOG_VERSION_ID = 0
+
+_BUMP_CATALOG = f"""
+    UPDATE product_versions SET version = version + 1 WHERE product_id = {CATALOG_VERSION_ID};
+"""
+
+_BUMP_PRODUCT = """
+    INSERT INTO product_versions (product_id, version) VALUES (new.id, 1)
+    ON CONFLICT (product_id) DO UPDATE SET version = version + 1;
+"""
+
+_BUMP_LISTING = """
+    INSERT INTO product_versions (product_id, version, listing_version) VALUES (new.id, 1, 1)
+    ON CONFLICT (product_id) DO UPDATE SET version = version + 1, listing_version = listing_version + 1;
+"""
+
+# Columns a listing page shows; writes to any other column (e.g. created_by)
+# bump only the product's own counter
+_LISTING_COLUMNS = ("name", "description", "price", "stock", "category", "category_id", "image_url", "created_at")
+_LISTING_CHANGED = " OR ".join(f"old.{column} IS NOT new.{column}" for column in _LISTING_COLUMNS)
+
+# Every write to products bumps that product's counter, and every write that
+# listings can see also bumps its listing counter and the catalog counter.
+# Category writes bump the catalog counter too. Triggers catch bulk Core
+# statements as well, so version reads never need the products table.
+_TRIGGERS = {
+    "product_versions_ai": f"""
+    AFTER INSERT ON products BEGIN
+        {_BUMP_LISTING}
+        {_BUMP_CATALOG}
+    END
+    """,
+    "product_versions_au": f"""
+    AFTER UPDATE ON products WHEN NOT ({_LISTING_CHANGED}) BEGIN
+        {_BUMP_PRODUCT}
+    END
+    """,
+    "product_versions_au_listing": f"""
+    AFTER UPDATE ON products WHEN {_LISTING_CHANGED} BEGIN
+        {_BUMP_LISTING}
+        {_BUMP_CATALOG}
+    END
+    """,
+    "product_versions_ad": f"""
+    AFTER DELETE ON products BEGIN
+        DELETE FROM product_versions WHERE product_id = old.id;
+        {_BUMP_CATALOG}
+    END
+    """,
+    # Renaming or re-parenting a category changes which products a tree-mode
+    # listing holds without touching any product row
+    "product_versions_category_ai": f"""
+    AFTER INSERT ON categories BEGIN
+        {_BUMP_CATALOG}
+    END
+    """,
+    "product_versions_category_au": f"""
+    AFTER UPDATE OF name, parent_id ON categories BEGIN
+        {_BUMP_CATALOG}
+    END
+    """,
+    "product_versions_category_ad": f"""
+    AFTER DELETE ON categories BEGIN
+        {_BUMP_CATALOG}
+    END
+    """,
+}
+
+_versions_enabled = False
+
+
+def init_catalog_versions(engine: Engine) -> None:
+    """Install the version triggers and seed counters for existing products"""
+    global _versions_enabled
+
+    if engine.dialect.name != "sqlite":
+        logger.warning("Catalog versioning requires SQLite triggers; ETags are disabled")
+        return
+
+    columns = {column["name"] for column in inspect(engine).get_columns("product_versions")}
+    with engine.begin() as conn:
+        if "listing_version" not in columns:
+            logger.info("Adding product_versions.listing_version column")
+            conn.execute(text("ALTER TABLE product_versions ADD COLUMN listing_version INTEGER NOT NULL DEFAULT 1"))
+
+        # Recreated on every start so databases pick up changed trigger bodies
+        for name, body in _TRIGGERS.items():
+            conn.execute(text(f"DROP TRIGGER IF EXISTS {name}"))
+            conn.execute(text(f"CREATE TRIGGER {name} {body}"))
+
+        seeded = conn.execute(
+            text("SELECT 1 FROM product_versions WHERE product_id = :id"),
+            {"id": CATALOG_VERSION_ID}
+        ).first()
+        if not seeded:
+            conn.execute(text("INSERT OR IGNORE INTO product_versions (product_id, version) SELECT id, 1 FROM products"))
+            conn.execute(
+                text("INSERT INTO product_versions (product_id, version) VALUES (:id, 1)"),
+                {"id": CATALOG_VERSION_ID}
+            )
+
+    _versions_enabled = True
+    logger.info("Catalog version triggers ready")
+
+
+def get_product_version(db: Session, product_id: int) -> Optional[int]:
+    if not _versions_enabled:
+        return None
+    return db.scalar(select(ProductVersion.version).where(ProductVersion.product_id == product_id))
+
+
+def query_products_with_versions(db: Session) -> Query:
+    """
+    (Product, version) rows, read together so a cached body never carries a
+    version newer than itself; the version is None when versioning is off.
+    """
+    return db.query(Product, ProductVersion.version).outerjoin(
+        ProductVersion, ProductVersion.product_id == Product.id
+    )
+
+
+def get_catalog_version(db: Session) -> Optional[int]:
+    return get_product_version(db, CATALOG_VERSION_ID)
+
+
+def product_etag(product_id: int, version: int) -> str:
+    return f'"p{product_id}-{version}"'
+
+
+def catalog_etag(version: int) -> str:
+    return f'"c{version}"'
@@ -0,0 +1,48 @@
+import logging
+import threading
+from typing import Callable
+
+from sqlalchemy.orm import Session
+
+from app.core.database import SessionLocal
+
+logger = logging.getLogger("app.utils.background")
+
+
+class BackgroundRefresh:
+    """
+    Runs an in-memory index refresh in a daemon thread, at most one at a time.
+
+    The job gets its own session, since it outlives the request that noticed
+    the index was stale. Readers keep serving the previous structure until the
+    job swaps the new one in.
+    """
+
+    def __init__(self, name: str, job: Callable[[Session], None]):
+        self.name = name
+        self._job = job
+        self._lock = threading.Lock()
+        self._running = False
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    def trigger(self) -> bool:
+        """Start the job unless it is already running; never blocks the caller"""
+        with self._lock:
+            if self._running:
+                return False
+            self._running = True
+        threading.Thread(target=self._run, name=self.name, daemon=True).start()
+        return True
+
+    def _run(self) -> None:
+        try:
+            with SessionLocal() as db:
+                self._job(db)
+        except Exception:
+            logger.exception(f"Background refresh {self.name} failed")
+        finally:
+            with self._lock:
+                self._running = False
@@ -0,0 +1,22 @@
+from datetime import datetime, timezone
+from typing import Optional
+
+
+def to_db_timestamp(value: datetime) -> str:
+    """
+    Format a datetime the way SQLite's CURRENT_TIMESTAMP stores it (naive UTC text),
+    so it compares correctly against server-defaulted columns.
+    """
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value.isoformat(sep=" ")
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an entity tag (RFC 9110)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return any((tag[2:] if tag.startswith("W/") else tag) == etag for tag in candidates)
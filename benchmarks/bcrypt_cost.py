@@ -0,0 +1,38 @@
+"""
+Report bcrypt throughput per CPU core at each cost factor.
+
+    python -m benchmarks.bcrypt_cost --min-rounds 8 --max-rounds 14
+
+Each cost is timed on one thread, which bcrypt keeps fully busy, so the
+hashes/second column is the sign-in capacity of one core. Multiply by the
+cores given to PASSWORD_HASH_WORKERS for a worker's ceiling. Also shows the
+cost calibrate_bcrypt_rounds would pick for the given target.
+"""
+import argparse
+import os
+
+os.environ.setdefault("SECRET_KEY", "benchmark-only-secret-key-not-for-production")
+
+from app.core.security import calibrate_bcrypt_rounds, measure_bcrypt_seconds  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--min-rounds", type=int, default=8)
+    parser.add_argument("--max-rounds", type=int, default=14)
+    parser.add_argument("--samples", type=int, default=5, help="Hashes timed per cost (median is reported)")
+    parser.add_argument("--target-ms", type=float, default=200)
+    args = parser.parse_args()
+
+    print(f"{os.cpu_count()} CPU cores available\n")
+    print(f"{'rounds':>6}{'ms/hash':>12}{'hashes/s/core':>16}")
+    for rounds in range(args.min_rounds, args.max_rounds + 1):
+        seconds = measure_bcrypt_seconds(rounds, samples=args.samples)
+        print(f"{rounds:>6}{seconds * 1000:>12.1f}{1 / seconds:>16.1f}")
+
+    chosen = calibrate_bcrypt_rounds(args.target_ms, args.min_rounds, args.max_rounds)
+    print(f"\nCalibration for a {args.target_ms:.0f} ms target picks cost {chosen}")
+
+
+if __name__ == "__main__":
+    main()
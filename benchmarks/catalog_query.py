@@ -0,0 +1,126 @@
+"""
+Compare product listing latency of the SQL path and the columnar catalog index.
+
+    python -m benchmarks.catalog_query --products 100000
+
+Builds a throwaway SQLite catalog, then times the same filter/sort/page
+queries through pagination.paginate and ColumnarCatalog.page.
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+_workdir = tempfile.mkdtemp(prefix="catalog-bench-")
+os.environ.setdefault("SQLALCHEMY_DATABASE_URI", f"sqlite:///{_workdir}/bench.db")
+os.environ.setdefault("SECRET_KEY", "benchmark-only-secret-key-not-for-production")
+
+from sqlalchemy import insert, text  # noqa: E402
+
+import app.cart.models  # noqa: E402,F401  (relationship targets of Product)
+import app.orders.models  # noqa: E402,F401
+from app.core.database import Base, SessionLocal, engine, create_missing_indexes  # noqa: E402
+from app.products.categories import add_category_column, init_categories  # noqa: E402
+from app.products.columnar import ColumnarCatalog  # noqa: E402
+from app.products.models import Product  # noqa: E402
+from app.products.pagination import paginate  # noqa: E402
+from app.products.routes import apply_product_filters  # noqa: E402
+from app.products.schemas import ProductFilters  # noqa: E402
+from app.products.search import init_search_index  # noqa: E402
+from app.products.versions import get_catalog_version, init_catalog_versions  # noqa: E402
+
+CATEGORIES = ["Shoes", "Apparel", "Toys", "Books", "Garden", "Kitchen", "Audio", "Sports"]
+
+QUERIES = [
+    ("newest first", dict(), "created_at", "desc"),
+    ("by name", dict(), "name", "asc"),
+    ("category by price", dict(category="Shoes"), "price", "asc"),
+    ("price range", dict(min_price=20, max_price=80), "price", "desc"),
+    ("category + range by name", dict(category="Toys", min_price=10, max_price=50), "name", "asc"),
+]
+
+
+def seed(count: int) -> None:
+    Base.metadata.create_all(bind=engine)
+    add_category_column(engine)
+    create_missing_indexes()
+    init_search_index(engine)
+    init_catalog_versions(engine)
+    init_categories(engine)
+
+    rng = random.Random(42)
+    db = SessionLocal()
+    for start in range(0, count, 10000):
+        db.execute(insert(Product.__table__), [
+            dict(
+                name=f"Product {rng.randint(0, count)}",
+                category=rng.choice(CATEGORIES),
+                price=round(rng.uniform(1, 100), 2),
+                stock=rng.randint(0, 500),
+                created_by=1
+            )
+            for _ in range(start, min(count, start + 10000))
+        ])
+        db.commit()
+    db.execute(text("UPDATE products SET created_at = datetime('2024-01-01', '+' || (id * 37 % 100000) || ' minutes')"))
+    db.commit()
+    db.close()
+
+
+def timed(run, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--products", type=int, default=100000)
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--pages", type=int, default=3, help="Pages walked per query via next_cursor")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"Seeding {args.products} products in {_workdir}")
+    seed(args.products)
+
+    db = SessionLocal()
+    version = get_catalog_version(db)
+    catalog = ColumnarCatalog()
+    started = time.perf_counter()
+    catalog.build(db)
+    print(f"Columnar snapshot built in {(time.perf_counter() - started) * 1000:.0f} ms\n")
+
+    def walk(fetch, params, sort_by, sort_order):
+        def run():
+            cursor = None
+            for _ in range(args.pages):
+                filters = ProductFilters(**params, cursor=cursor, page_size=args.page_size)
+                _, cursor = fetch(filters, sort_by, sort_order)
+                if cursor is None:
+                    break
+            db.expunge_all()
+        return run
+
+    def sql(filters, sort_by, sort_order):
+        query = apply_product_filters(db.query(Product), filters)
+        return paginate(query, sort_by, sort_order, filters.cursor, filters.page_size)
+
+    def columnar(filters, sort_by, sort_order):
+        return catalog.page(db, version, filters, sort_by, sort_order)
+
+    print(f"{'query':<28}{'sql ms':>10}{'columnar ms':>14}{'speedup':>10}")
+    for label, params, sort_by, sort_order in QUERIES:
+        sql_ms = timed(walk(sql, params, sort_by, sort_order), args.repeat)
+        columnar_ms = timed(walk(columnar, params, sort_by, sort_order), args.repeat)
+        print(f"{label:<28}{sql_ms:>10.2f}{columnar_ms:>14.2f}{sql_ms / columnar_ms:>9.1f}x")
+    print(f"\n(median of {args.repeat} runs, {args.pages} pages of {args.page_size} each)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Time "similar products" queries against a synthetic catalog.
+
+    python -m benchmarks.similar_products --products 100000
+
+Builds a throwaway SQLite catalog whose names and descriptions draw words
+from a Zipf-distributed vocabulary, builds the TF-IDF index, then times
+SimilarityIndex.similar for random products.
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+_workdir = tempfile.mkdtemp(prefix="similar-bench-")
+os.environ.setdefault("SQLALCHEMY_DATABASE_URI", f"sqlite:///{_workdir}/bench.db")
+os.environ.setdefault("SECRET_KEY", "benchmark-only-secret-key-not-for-production")
+
+from sqlalchemy import insert  # noqa: E402
+
+import app.auth.models  # noqa: E402,F401  (relationship targets of Product)
+import app.cart.models  # noqa: E402,F401
+import app.orders.models  # noqa: E402,F401
+from app.core.database import Base, SessionLocal, engine  # noqa: E402
+from app.products.models import Product  # noqa: E402
+from app.products.similarity import SimilarityIndex  # noqa: E402
+
+CATEGORIES = ["Shoes", "Apparel", "Toys", "Books", "Garden", "Kitchen", "Audio", "Sports"]
+
+
+def seed(count: int, vocabulary: int) -> None:
+    Base.metadata.create_all(bind=engine)
+
+    rng = random.Random(42)
+    words = [f"w{i}" for i in range(vocabulary)]
+    # Zipf-like: a few words are everywhere, most are rare
+    weights = [1 / (rank + 1) for rank in range(vocabulary)]
+
+    db = SessionLocal()
+    for start in range(0, count, 10000):
+        db.execute(insert(Product.__table__), [
+            dict(
+                name=" ".join(rng.choices(words, weights, k=4)),
+                description=" ".join(rng.choices(words, weights, k=30)),
+                category=rng.choice(CATEGORIES),
+                price=round(rng.uniform(1, 100), 2),
+                stock=rng.randint(0, 500),
+                created_by=1
+            )
+            for _ in range(start, min(count, start + 10000))
+        ])
+        db.commit()
+    db.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--products", type=int, default=100000)
+    parser.add_argument("--vocabulary", type=int, default=20000)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"Seeding {args.products} products in {_workdir}")
+    seed(args.products, args.vocabulary)
+
+    index = SimilarityIndex()
+    started = time.perf_counter()
+    with SessionLocal() as db:
+        index.build(db)
+    print(f"Index built in {time.perf_counter() - started:.2f} s")
+
+    rng = random.Random(7)
+    samples = []
+    for _ in range(args.queries):
+        product_id = rng.randint(1, args.products)
+        started = time.perf_counter()
+        index.similar(product_id, args.limit)
+        samples.append(time.perf_counter() - started)
+
+    samples.sort()
+    print(
+        f"similar(): median {statistics.median(samples) * 1000:.2f} ms, "
+        f"p95 {samples[int(len(samples) * 0.95)] * 1000:.2f} ms over {args.queries} queries"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""Cart endpoints must run a constant number of queries, whatever the cart size"""
+import asyncio
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.auth.models import User
+from app.auth.principals import Principal
+from app.auth.schemas import UserRole
+from app.cart.models import CartItem
+from app.cart.routes import add_to_cart, remove_from_cart, update_cart_item, view_cart
+from app.cart.schemas import CartItemCreate, CartItemUpdate
+from app.core.database import Base
+from app.orders.models import Order  # noqa: F401 - registers the mapper User.orders refers to
+from app.products.models import Product
+
+CART_SIZES = (1, 25)
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db(engine):
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def count_queries(engine):
+    @contextmanager
+    def counting():
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(engine, "before_cursor_execute", record)
+        try:
+            yield statements
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+
+    return counting
+
+
+def make_cart(db, size: int) -> Principal:
+    """A user with `size` products in their cart, plus one product left out of it"""
+    user = User(name="Shopper", email="shopper@example.com", hashed_password="x", role=UserRole.user)
+    db.add(user)
+    db.flush()
+    products = [
+        Product(name=f"Product {i}", price=10.0 + i, stock=100, created_by=user.id)
+        for i in range(size + 1)
+    ]
+    db.add_all(products)
+    db.flush()
+    db.add_all(CartItem(user_id=user.id, product_id=product.id, quantity=1) for product in products[:size])
+    db.commit()
+    return Principal(id=user.id, email=user.email, role=user.role, is_active=True)
+
+
+def run_counted(count_queries, call) -> tuple:
+    with count_queries() as statements:
+        cart = asyncio.run(call())
+    return cart, len(statements)
+
+
+@pytest.mark.parametrize("size", CART_SIZES)
+def test_view_cart_runs_one_query(db, count_queries, size):
+    user = make_cart(db, size)
+
+    cart, queries = run_counted(count_queries, lambda: view_cart(db=db, current_user=user))
+
+    assert queries == 1
+    assert cart.total_items == size
+    assert cart.total_price == sum(10.0 + i for i in range(size))
+
+
+@pytest.mark.parametrize("size", CART_SIZES)
+def test_add_new_product_query_count(db, count_queries, size):
+    user = make_cart(db, size)
+    product_id = size + 1  # the product left out of the cart
+
+    cart, queries = run_counted(
+        count_queries,
+        lambda: add_to_cart(CartItemCreate(product_id=product_id, quantity=2), db=db, current_user=user)
+    )
+
+    # product lookup, existing item lookup, insert, cart read
+    assert queries == 4
+    assert cart.total_items == size + 1
+
+
+@pytest.mark.parametrize("size", CART_SIZES)
+def test_add_existing_product_query_count(db, count_queries, size):
+    user = make_cart(db, size)
+
+    cart, queries = run_counted(
+        count_queries,
+        lambda: add_to_cart(CartItemCreate(product_id=1, quantity=2), db=db, current_user=user)
+    )
+
+    # product lookup, existing item lookup, update, cart read
+    assert queries == 4
+    assert cart.items[0].quantity == 3
+
+
+@pytest.mark.parametrize("size", CART_SIZES)
+def test_update_cart_item_query_count(db, count_queries, size):
+    user = make_cart(db, size)
+
+    cart, queries = run_counted(
+        count_queries,
+        lambda: update_cart_item(1, CartItemUpdate(quantity=5), db=db, current_user=user)
+    )
+
+    # cart item lookup, product lookup, update, cart read
+    assert queries == 4
+    assert cart.items[0].quantity == 5
+
+
+@pytest.mark.parametrize("size", CART_SIZES)
+def test_remove_from_cart_query_count(db, count_queries, size):
+    user = make_cart(db, size)
+
+    cart, queries = run_counted(count_queries, lambda: remove_from_cart(1, db=db, current_user=user))
+
+    # delete, cart read
+    assert queries == 2
+    assert cart.total_items == size - 1